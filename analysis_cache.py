@@ -0,0 +1,158 @@
+# analysis_cache.py
+
+import mmap
+import struct
+import zlib
+
+from transposition import EXACT
+
+# File layout: a 32-byte header, then fixed 32-byte records in buckets of
+# BUCKET_SLOTS, a position's bucket chosen by its Zobrist key.
+#   header: magic, version, record count, clock (bumped on every store)
+#   record: key (8 bytes), score (4, signed, for the side to move),
+#           move (4, packed), stamp (4, clock when last stored or hit),
+#           depth (1), bound (1, 0 = empty), padding, milliseconds the
+#           search took to complete this depth (4), CRC-32 of the rest (4)
+HEADER = struct.Struct("<4sB3xQI12x")
+RECORD = struct.Struct("<QiIIBB2xII")
+WORD = struct.Struct("<I")
+MAGIC = b"CMAC"
+VERSION = 2
+HEADER_BYTES = HEADER.size
+RECORD_BYTES = RECORD.size
+CHECKED_BYTES = RECORD_BYTES - 4
+CLOCK_OFFSET = 16
+BUCKET_SLOTS = 4
+
+EVICTION_POLICIES = ("depth", "lru")
+
+
+class AnalysisCache:
+    def __init__(self, path, size_mb=16, eviction="depth"):
+        """
+        Root search results (best move, score, depth, bound, time taken) kept
+        in a memory-mapped file, so they outlive the Search and the process
+        and are shared by every process that opens the same file.
+
+        Writes take no lock and never flush: the mapping is shared, so a
+        record is in the OS page cache as soon as it is written and survives
+        the process crashing or being killed. Each record carries a CRC-32;
+        one torn by a crash or by two processes writing the same slot at
+        once fails the check and reads as empty.
+
+        :param path: cache file, created if missing. An existing file keeps
+                     the size it was created with.
+        :param size_mb: size of a new file
+        :param eviction: which record of a full bucket a new position replaces:
+                         "depth" -> the shallowest (least recently used among equals),
+                         "lru"   -> the least recently stored or hit
+        """
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = path
+        self.eviction = eviction
+
+        records = max(BUCKET_SLOTS, (size_mb * 1024 * 1024) // RECORD_BYTES)
+        self.file = open(path, "a+b")
+        self.file.seek(0)
+        header = self.file.read(HEADER_BYTES)
+        valid = False
+        if len(header) == HEADER_BYTES:
+            magic, version, count, _ = HEADER.unpack(header)
+            size = self.file.seek(0, 2)
+            valid = (magic == MAGIC and version == VERSION and count and count % BUCKET_SLOTS == 0
+                     and size == HEADER_BYTES + count * RECORD_BYTES)
+            if valid:
+                records = count
+        if not valid:
+            # New (or unreadable) file: size it, then write the header last,
+            # so a crash part way leaves a file that is simply rebuilt
+            self.file.truncate(0)
+            self.file.truncate(HEADER_BYTES + records * RECORD_BYTES)
+            self.file.flush()
+        self.data = mmap.mmap(self.file.fileno(), 0)
+        if not valid:
+            self.data[:HEADER_BYTES] = HEADER.pack(MAGIC, VERSION, records, 0)
+        self.buckets = records // BUCKET_SLOTS
+
+    def _read(self, offset):
+        """
+        (key, score, move, stamp, depth, bound, milliseconds) of the record
+        at 'offset', or None if it is empty or fails its checksum.
+        """
+        data = self.data
+        record = RECORD.unpack_from(data, offset)
+        if not record[5] or zlib.crc32(data[offset:offset + CHECKED_BYTES]) != record[7]:
+            return None
+        return record[:7]
+
+    def _write(self, offset, key, score, move, stamp, depth, bound, millis):
+        body = RECORD.pack(key, score, move, stamp, depth, bound, millis, 0)[:CHECKED_BYTES]
+        self.data[offset:offset + RECORD_BYTES] = body + WORD.pack(zlib.crc32(body))
+
+    def _tick(self):
+        clock = (WORD.unpack_from(self.data, CLOCK_OFFSET)[0] + 1) & 0xFFFFFFFF
+        WORD.pack_into(self.data, CLOCK_OFFSET, clock)
+        return clock
+
+    def probe(self, key):
+        """
+        Return (depth, score, bound, move, seconds) for 'key', or None on a
+        miss: TranspositionTable.probe()'s fields plus the time the search
+        took to complete that depth. A hit counts as a use for "lru".
+        """
+        first = HEADER_BYTES + (key % self.buckets) * BUCKET_SLOTS * RECORD_BYTES
+        for offset in range(first, first + BUCKET_SLOTS * RECORD_BYTES, RECORD_BYTES):
+            record = self._read(offset)
+            if record is not None and record[0] == key:
+                _, score, move, _, depth, bound, millis = record
+                if self.eviction == "lru":
+                    self._write(offset, key, score, move, self._tick(), depth, bound, millis)
+                return depth, score, bound, move, millis / 1000.0
+        return None
+
+    def store(self, key, depth, score, bound=EXACT, move=0, seconds=0.0):
+        """
+        Record a search result. A position already cached is only
+        overwritten by a search at least as deep; otherwise the record
+        goes to an empty (or corrupt) slot of its bucket, else replaces
+        the one the eviction policy picks.
+        :param seconds: time the search took to complete 'depth'
+        """
+        first = HEADER_BYTES + (key % self.buckets) * BUCKET_SLOTS * RECORD_BYTES
+        victim = victim_rank = None
+        for offset in range(first, first + BUCKET_SLOTS * RECORD_BYTES, RECORD_BYTES):
+            record = self._read(offset)
+            if record is None:
+                rank = (-1, -1)
+            elif record[0] == key:
+                if record[4] > depth:
+                    return
+                victim = offset
+                break
+            elif self.eviction == "depth":
+                rank = (record[4], record[3])
+            else:
+                rank = (record[3], record[4])
+            if victim is None or rank < victim_rank:
+                victim, victim_rank = offset, rank
+        self._write(victim, key, int(score), move, self._tick(), min(depth, 0xFF), bound,
+                    min(int(seconds * 1000), 0xFFFFFFFF))
+
+    def clear(self):
+        """
+        Empty the cache for every process using the file.
+        """
+        self.data[HEADER_BYTES:] = bytes(len(self.data) - HEADER_BYTES)
+
+    def flush(self):
+        """
+        Write the cache through to disk (records already survive a process
+        crash without this; call it to survive a power loss).
+        """
+        self.data.flush()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
@@ -0,0 +1,107 @@
+# background.py
+
+import copy
+import threading
+
+
+class BackgroundSearch:
+    def __init__(self, search, on_finished=None):
+        """
+        Runs a Search on a worker thread so the caller (the GUI loop, the UCI
+        loop) stays responsive. One search at a time; starting a new one
+        cancels the old one.
+        :param search: Search -> the engine's search; its transposition table
+                       carries over from one background search to the next
+        :param on_finished: called on the search thread with the result of
+                            every search that ends by itself or by stop()
+                            (not by cancel()), as an alternative to poll()
+        """
+        self.search = search
+        self.on_finished = on_finished
+        self.thread = None
+        self.stop_event = None
+        self.result = None
+        # The opponent move a running ponder search assumed, or None
+        self.ponder_move = None
+
+    def start(self, board, color, **limits):
+        """
+        Search a private copy of 'board' for 'color' ('limits' are the keyword
+        limits of Search.find_best_line, e.g. movetime=500). Returns at once;
+        poll() returns the result when it is ready.
+        """
+        self._launch(copy.deepcopy(board), color, None, limits)
+
+    def ponder(self, board, expected_move, color, **limits):
+        """
+        Think on the opponent's time: play 'expected_move' (the opponent's
+        predicted reply, usually the second move of our last PV) on a copy of
+        'board' and search the position for 'color' with the clock stopped.
+        Call ponderhit() if the opponent plays it, cancel() otherwise.
+        """
+        board = copy.deepcopy(board)
+        board.make_move(expected_move)
+        self._launch(board, color, expected_move, dict(limits, ponder=True))
+
+    def _launch(self, board, color, ponder_move, limits):
+        self.cancel()
+        self.result = None
+        self.ponder_move = ponder_move
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(board, color, self.stop_event, limits),
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self, board, color, stop_event, limits):
+        result = self.search.find_best_line(board, color, stop=stop_event, **limits)
+        if threading.current_thread() is self.thread:  # i.e. not cancelled
+            self.result = result
+            if self.on_finished is not None:
+                self.on_finished(result)
+
+    def ponderhit(self):
+        """
+        The predicted move was played: keep the ponder search running as the
+        real search (its time budget starts now).
+        """
+        self.ponder_move = None
+        self.search.ponderhit()
+
+    def is_hit(self, move):
+        """
+        True if 'move', just played by the opponent, is the one we are pondering on.
+        """
+        return self.ponder_move is not None and move is not None and move.packed == self.ponder_move.packed
+
+    def poll(self):
+        """
+        (best_move, score, pv) of a finished search, or None while it is
+        still running (or pondering before a ponder hit).
+        """
+        if self.thread is None or self.thread.is_alive() or self.ponder_move is not None:
+            return None
+        return self.result
+
+    def stop(self):
+        """
+        Finish early: the search returns the best move of its last completed depth.
+        """
+        if self.thread is not None:
+            self.ponder_move = None
+            self.stop_event.set()
+            self.thread.join()
+
+    def cancel(self):
+        """
+        Abandon the running search (if any) and drop its result.
+        """
+        thread, self.thread = self.thread, None
+        if thread is not None:
+            self.stop_event.set()
+            thread.join()
+        self.result = None
+        self.ponder_move = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
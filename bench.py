@@ -0,0 +1,162 @@
+# bench.py
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from engines import ENGINES, opponent
+from evaluator import Evaluator, encode_positions, psq_totals
+from fen import load_fen
+from perft import REFERENCE_POSITIONS
+from search import Search
+
+
+def run_bench(engine="bitboard", depth=4, positions=None, **search_options):
+    """
+    Search each position to a fixed depth with a fresh Search and report
+    nodes-to-depth. 'search_options' are passed to Search(), e.g.
+    use_killers=False, so heuristics can be compared on the same positions.
+    """
+    results = []
+    for name, fen, _ in positions or REFERENCE_POSITIONS:
+        board = ENGINES[engine]()
+        color = load_fen(board, fen)
+        search = Search(**search_options)
+        start = time.perf_counter()
+        move = search.find_best_move(board, color, depth=depth)
+        elapsed = time.perf_counter() - start
+        search.close()
+        results.append({
+            "position": name,
+            "fen": fen,
+            "depth": search.completed_depth,
+            "move": str(move) if move else None,
+            "score": search.best_score,
+            "pv": [str(m) for m in search.principal_variation],
+            "nodes": search.nodes,
+            "seconds": round(elapsed, 6),
+            "nps": int(search.nodes / elapsed) if elapsed > 0 else 0,
+            "iterations": [{"depth": it["depth"], "nodes": it["nodes"]} for it in search.iterations],
+        })
+    return results
+
+
+def sample_positions(count, engine="bitboard", seed=0, plies=40):
+    """
+    'count' positions reached by seeded random playouts from the reference
+    positions, each one an independent board.
+    """
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        for _, fen, _ in REFERENCE_POSITIONS:
+            board = ENGINES[engine]()
+            color = load_fen(board, fen)
+            for _ in range(rng.randrange(plies)):
+                moves = board.generate_legal_moves(color)
+                if not moves:
+                    break
+                board.make_move(rng.choice(moves))
+                color = opponent(color)
+            boards.append(board)
+    return boards[:count]
+
+
+def run_eval_bench(count=10000, engine="bitboard"):
+    """
+    Positions per second of the scalar Evaluator.evaluate() against the
+    NumPy batch path Evaluator.evaluate_many(), with and without encoding.
+    """
+    evaluator = Evaluator()
+    boards = sample_positions(count, engine)
+    timings = {}
+
+    start = time.perf_counter()
+    scalar = [evaluator.evaluate(board) for board in boards]
+    timings["scalar_incremental"] = time.perf_counter() - start
+
+    # The scalar cost without incremental totals: summing every piece per call
+    start = time.perf_counter()
+    for board in boards:
+        psq_totals(board)
+    timings["scalar_full"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes = encode_positions(boards)
+    timings["encode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = evaluator.evaluate_many(codes)
+    timings["batch"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluator.evaluate_many(codes, mobility=True)
+    timings["batch_mobility"] = time.perf_counter() - start
+
+    return {
+        "positions": count,
+        "matches_scalar": [int(score) for score in batch] == scalar,
+        "positions_per_second": {name: int(count / seconds) if seconds > 0 else 0
+                                 for name, seconds in timings.items()},
+    }
+
+
+def main(argv=None):
+    """
+    Usage examples:
+      python bench.py                      -> depth 4 on the reference positions
+      python bench.py --depth 5 --json     -> machine-readable results
+      python bench.py --no-killers         -> same search without killer moves
+      python bench.py --workers 8          -> root moves split over 8 processes
+      python bench.py --eval-batch 20000   -> scalar vs NumPy batch evaluation
+    """
+    parser = argparse.ArgumentParser(description="Search nodes-to-depth benchmark")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitboard")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--no-killers", action="store_true")
+    parser.add_argument("--no-history", action="store_true")
+    parser.add_argument("--no-null-move", action="store_true")
+    parser.add_argument("--no-lmr", action="store_true")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for the root moves of deeper iterations")
+    parser.add_argument("--eval-batch", type=int, metavar="N",
+                        help="benchmark evaluation of N positions instead of search (needs NumPy)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.eval_batch:
+        result = run_eval_bench(args.eval_batch, args.engine)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            for name, pps in result["positions_per_second"].items():
+                print(f"{name:<20} {pps:>10} positions/s")
+            print(f"\n{result['positions']} positions, batch scores match scalar: {result['matches_scalar']}")
+        return 0
+
+    results = run_bench(args.engine, args.depth,
+                        use_killers=not args.no_killers,
+                        use_history=not args.no_history,
+                        use_null_move=not args.no_null_move,
+                        use_lmr=not args.no_lmr,
+                        workers=args.workers)
+    total_nodes = sum(r["nodes"] for r in results)
+    total_seconds = sum(r["seconds"] for r in results)
+    nps = int(total_nodes / total_seconds) if total_seconds > 0 else 0
+
+    if args.json:
+        print(json.dumps({"engine": args.engine, "depth": args.depth, "total_nodes": total_nodes,
+                          "total_seconds": round(total_seconds, 6), "nps": nps,
+                          "results": results}, indent=2))
+    else:
+        for r in results:
+            print(f"{r['position']:<10} depth {r['depth']}  {r['move']:<6} score {r['score']:>6}  "
+                  f"{r['nodes']:>8} nodes  {r['seconds']:7.3f}s  {r['nps']:>7} nps  pv {' '.join(r['pv'])}")
+        print(f"\nTotal: {total_nodes} nodes in {total_seconds:.3f}s ({nps} nps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,863 @@
+# bitboard.py
+
+from move import Move
+from pieces.pawn import Pawn
+from pieces.rook import Rook
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.queen import Queen
+from pieces.king import King
+from pieces.piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK, COLOR_INDEX
+from evaluator import PSQ, PHASE_WEIGHTS
+from zobrist import PIECE_SQUARE_KEYS, SIDE_KEY, compute_key, state_key
+from fen import load_fen, board_to_fen, side_to_move, move_counters
+from movepicker import is_tactical, staged_moves
+
+# Squares are numbered row*8 + col, using the same (row, col) layout as Board:
+# row=0 is rank 8, so a8 = 0, h8 = 7, a1 = 56, h1 = 63.
+# Piece kinds and color indexes come from pieces/piece.py (PAWN..KING = 0..5, WHITE/BLACK = 0/1)
+COLOR_NAMES = ("WHITE", "BLACK")
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+# The shared piece instances, PIECES[color index][kind]
+PIECES = [[cls(color) for cls in PIECE_CLASSES] for color in COLOR_NAMES]
+PROMOTION_INDEX = {'q': QUEEN, 'r': ROOK, 'b': BISHOP, 'n': KNIGHT}
+PROMOTION_CHOICES = ['q', 'r', 'b', 'n']
+
+FULL = (1 << 64) - 1
+
+
+def _build_jump_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+def _build_ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _build_jump_table([(2, 1), (2, -1), (-2, 1), (-2, -1),
+                                    (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _build_jump_table([(1, 0), (-1, 0), (0, 1), (0, -1),
+                                  (1, 1), (1, -1), (-1, 1), (-1, -1)])
+# PAWN_ATTACKS[color][sq]: squares a pawn of 'color' standing on sq attacks
+PAWN_ATTACKS = (_build_jump_table([(-1, -1), (-1, 1)]),
+                _build_jump_table([(1, -1), (1, 1)]))
+
+# Rays pointing towards higher square numbers are scanned with the lowest
+# set bit, rays pointing towards lower square numbers with the highest one.
+RAY_N = _build_ray_table(-1, 0)
+RAY_S = _build_ray_table(1, 0)
+RAY_E = _build_ray_table(0, 1)
+RAY_W = _build_ray_table(0, -1)
+RAY_NE = _build_ray_table(-1, 1)
+RAY_NW = _build_ray_table(-1, -1)
+RAY_SE = _build_ray_table(1, 1)
+RAY_SW = _build_ray_table(1, -1)
+
+ROW_MASKS = [0xFF << (8 * row) for row in range(8)]
+
+
+def _build_between_table():
+    """
+    BETWEEN[a][b]: squares strictly between a and b when they share a rank,
+    file or diagonal, else 0.
+    """
+    table = [[0] * 64 for _ in range(64)]
+    # Rays towards higher square numbers start at their lowest bit, the others at their highest
+    for rays, ascending in ((RAY_S, True), (RAY_E, True), (RAY_SE, True), (RAY_SW, True),
+                            (RAY_N, False), (RAY_W, False), (RAY_NE, False), (RAY_NW, False)):
+        for a in range(64):
+            ray = rays[a]
+            between = 0
+            while ray:
+                nearest = ray & -ray if ascending else 1 << (ray.bit_length() - 1)
+                ray ^= nearest
+                table[a][nearest.bit_length() - 1] = between
+                between |= nearest
+    return table
+
+
+BETWEEN = _build_between_table()
+
+
+def rook_attacks(sq, occupied):
+    attacks = 0
+    ray = RAY_S[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_S[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_E[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_E[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_N[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_N[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAY_W[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_W[blockers.bit_length() - 1]
+    return attacks | ray
+
+
+def bishop_attacks(sq, occupied):
+    attacks = 0
+    ray = RAY_SE[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_SE[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_SW[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_SW[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_NE[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_NE[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAY_NW[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= RAY_NW[blockers.bit_length() - 1]
+    return attacks | ray
+
+
+# Castling rights are lost whenever something moves from or to one of these squares
+CASTLING_SQUARES = {
+    60: ("white_can_castle_kingside", "white_can_castle_queenside"),
+    63: ("white_can_castle_kingside",),
+    56: ("white_can_castle_queenside",),
+    4: ("black_can_castle_kingside", "black_can_castle_queenside"),
+    7: ("black_can_castle_kingside",),
+    0: ("black_can_castle_queenside",),
+}
+
+
+class BitBoard:
+    def __init__(self):
+        """
+        Board stored as one 64-bit integer per (color, piece type), plus a
+        64-entry mailbox of Piece objects so get_piece_at() and Move objects
+        behave exactly like they do with Board.
+        """
+        self.pieces = [[0] * 6 for _ in range(2)]
+        self.occupancy = [0, 0]
+        self.mailbox = [None] * 64
+
+        self.white_can_castle_kingside = True
+        self.white_can_castle_queenside = True
+        self.black_can_castle_kingside = True
+        self.black_can_castle_queenside = True
+
+        # Same (row, col) convention as Board, or None
+        self.en_passant_target = None
+
+        # Move history for undo
+        self.move_history = []
+        # Side to move and move counters of the position the history starts
+        # from (set by load_fen), for to_fen()
+        self.start_color = "WHITE"
+        self.start_halfmove_clock = 0
+        self.start_fullmove_number = 1
+
+        # Material + piece-square score and game phase, as on Board
+        self.psq_score = 0
+        self.phase = 0
+
+        # 64-bit Zobrist hash, same keys as Board so both engines agree
+        self.zobrist_key = compute_key(self)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a BitBoard holding the same position as a 2D-list Board.
+        The Piece objects are shared, so Moves from either board refer to the same pieces.
+        """
+        bitboard = cls()
+        for row in range(8):
+            for col in range(8):
+                piece = board.get_piece_at(row, col)
+                if piece:
+                    bitboard.set_piece_at(row, col, piece)
+        bitboard.white_can_castle_kingside = board.white_can_castle_kingside
+        bitboard.white_can_castle_queenside = board.white_can_castle_queenside
+        bitboard.black_can_castle_kingside = board.black_can_castle_kingside
+        bitboard.black_can_castle_queenside = board.black_can_castle_queenside
+        bitboard.en_passant_target = board.en_passant_target
+        bitboard.start_color = side_to_move(board)
+        bitboard.start_halfmove_clock, bitboard.start_fullmove_number = move_counters(board)
+        bitboard.zobrist_key = board.zobrist_key
+        return bitboard
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        A new board set up from a FEN string, including castling rights,
+        en passant square, side to move and move counters.
+        """
+        board = cls()
+        load_fen(board, fen)
+        return board
+
+    def to_fen(self):
+        """
+        FEN string of the current position (side to move and move counters
+        follow from the FEN it was loaded from and the moves made since).
+        """
+        return board_to_fen(self)
+
+    def setup_initial_position(self):
+        self.pieces = [[0] * 6 for _ in range(2)]
+        self.occupancy = [0, 0]
+        self.mailbox = [None] * 64
+        self.psq_score = 0
+        self.phase = 0
+
+        back_rank = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
+        for col in range(8):
+            self.set_piece_at(0, col, back_rank[col]("BLACK"))
+            self.set_piece_at(1, col, Pawn("BLACK"))
+            self.set_piece_at(6, col, Pawn("WHITE"))
+            self.set_piece_at(7, col, back_rank[col]("WHITE"))
+        self.zobrist_key = compute_key(self)
+
+    def parse_move_string(self, move_str, color):
+        """
+        Given a string like 'e2e4' (or 'e7e8q' for a promotion), convert to a
+        Move object. If invalid format, return None.
+        """
+        if len(move_str) < 4:
+            return None
+
+        start_col = ord(move_str[0]) - ord('a')
+        start_row = 8 - int(move_str[1])
+        end_col = ord(move_str[2]) - ord('a')
+        end_row = 8 - int(move_str[3])
+
+        if not (0 <= start_row < 8 and 0 <= start_col < 8):
+            return None
+        if not (0 <= end_row < 8 and 0 <= end_col < 8):
+            return None
+
+        piece_moved = self.mailbox[start_row * 8 + start_col]
+        if piece_moved is None or piece_moved.color != color:
+            return None
+
+        piece_captured = self.mailbox[end_row * 8 + end_col]
+        promotion = move_str[4].lower() if len(move_str) > 4 else None
+        if promotion is not None and promotion not in PROMOTION_CHOICES:
+            return None
+        return Move(start_row, start_col, end_row, end_col, piece_moved, piece_captured, promotion)
+
+    def get_piece_at(self, row, col):
+        return self.mailbox[row * 8 + col]
+
+    def set_piece_at(self, row, col, piece):
+        sq = row * 8 + col
+        bit = 1 << sq
+        old = self.mailbox[sq]
+        if old is not None:
+            c = old.color_index
+            t = old.kind
+            self.pieces[c][t] &= ~bit
+            self.occupancy[c] &= ~bit
+            self.zobrist_key ^= PIECE_SQUARE_KEYS[c][t][sq]
+            self.psq_score -= PSQ[c][t][sq]
+            self.phase -= PHASE_WEIGHTS[t]
+        self.mailbox[sq] = piece
+        if piece is not None:
+            c = piece.color_index
+            t = piece.kind
+            self.pieces[c][t] |= bit
+            self.occupancy[c] |= bit
+            self.zobrist_key ^= PIECE_SQUARE_KEYS[c][t][sq]
+            self.psq_score += PSQ[c][t][sq]
+            self.phase += PHASE_WEIGHTS[t]
+
+    def is_legal_move(self, move, color):
+        self.make_move(move)
+        still_legal = not self.is_in_check(color)
+        self.undo_move()
+        return still_legal
+
+    def make_move(self, move):
+        """
+        Apply a Move produced by this board, Board or parse_move_string().
+        Captures, en passant, promotion (queen by default) and castling
+        follow the same rules as Board.make_move.
+        """
+        frm = move.start_row * 8 + move.start_col
+        to = move.end_row * 8 + move.end_col
+        mailbox = self.mailbox
+        piece = mailbox[frm]
+        c = piece.color_index
+        t = piece.kind
+        own = self.pieces[c]
+        enemy = self.pieces[c ^ 1]
+
+        captured = mailbox[to]
+        captured_sq = to
+        if t == PAWN and captured is None and move.start_col != move.end_col:
+            # En passant: the captured pawn sits beside the moving pawn
+            captured_sq = frm - move.start_col + move.end_col
+            captured = mailbox[captured_sq]
+
+        self.move_history.append((move, self.white_can_castle_kingside, self.white_can_castle_queenside,
+                                  self.black_can_castle_kingside, self.black_can_castle_queenside,
+                                  self.en_passant_target, piece, captured, captured_sq,
+                                  self.zobrist_key, self.psq_score, self.phase))
+        key = self.zobrist_key ^ state_key(self) ^ SIDE_KEY
+        own_keys = PIECE_SQUARE_KEYS[c]
+        own_psq = PSQ[c]
+
+        if captured is not None:
+            bit = 1 << captured_sq
+            ct = captured.kind
+            enemy[ct] ^= bit
+            self.occupancy[c ^ 1] ^= bit
+            mailbox[captured_sq] = None
+            key ^= PIECE_SQUARE_KEYS[c ^ 1][ct][captured_sq]
+            self.psq_score -= PSQ[c ^ 1][ct][captured_sq]
+            self.phase -= PHASE_WEIGHTS[ct]
+
+        move_bits = (1 << frm) | (1 << to)
+        own[t] ^= move_bits
+        self.occupancy[c] ^= move_bits
+        mailbox[frm] = None
+        mailbox[to] = piece
+        key ^= own_keys[t][frm] ^ own_keys[t][to]
+        self.psq_score += own_psq[t][to] - own_psq[t][frm]
+
+        self.en_passant_target = None
+        if t == PAWN:
+            if move.end_row == 0 or move.end_row == 7:
+                promo = move.promotion.lower() if move.promotion else 'q'
+                pt = PROMOTION_INDEX[promo]
+                own[PAWN] ^= 1 << to
+                own[pt] |= 1 << to
+                mailbox[to] = PIECES[c][pt]
+                key ^= own_keys[PAWN][to] ^ own_keys[pt][to]
+                self.psq_score += own_psq[pt][to] - own_psq[PAWN][to]
+                self.phase += PHASE_WEIGHTS[pt]
+            elif abs(move.end_row - move.start_row) == 2:
+                self.en_passant_target = ((move.start_row + move.end_row) // 2, move.end_col)
+        elif t == KING and abs(move.end_col - move.start_col) == 2:
+            if move.end_col == 6:
+                rook_from, rook_to = to + 1, to - 1
+            else:
+                rook_from, rook_to = to - 2, to + 1
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            own[ROOK] ^= rook_bits
+            self.occupancy[c] ^= rook_bits
+            mailbox[rook_to] = mailbox[rook_from]
+            mailbox[rook_from] = None
+            key ^= own_keys[ROOK][rook_from] ^ own_keys[ROOK][rook_to]
+            self.psq_score += own_psq[ROOK][rook_to] - own_psq[ROOK][rook_from]
+
+        if frm in CASTLING_SQUARES:
+            for right in CASTLING_SQUARES[frm]:
+                setattr(self, right, False)
+        if to in CASTLING_SQUARES:
+            for right in CASTLING_SQUARES[to]:
+                setattr(self, right, False)
+
+        self.zobrist_key = key ^ state_key(self)
+
+    def make_null_move(self):
+        """
+        Pass the turn without moving a piece (used by null-move pruning).
+        Undo it with undo_move().
+        """
+        self.move_history.append((None, self.white_can_castle_kingside, self.white_can_castle_queenside,
+                                  self.black_can_castle_kingside, self.black_can_castle_queenside,
+                                  self.en_passant_target, None, None, None, self.zobrist_key,
+                                  self.psq_score, self.phase))
+        key = self.zobrist_key ^ state_key(self) ^ SIDE_KEY
+        self.en_passant_target = None
+        self.zobrist_key = key ^ state_key(self)
+
+    def undo_move(self):
+        if not self.move_history:
+            return
+        (move,
+         w_cks, w_cqs,
+         b_cks, b_cqs,
+         enp, piece, captured, captured_sq, key, psq_score, phase) = self.move_history.pop()
+        self.white_can_castle_kingside = w_cks
+        self.white_can_castle_queenside = w_cqs
+        self.black_can_castle_kingside = b_cks
+        self.black_can_castle_queenside = b_cqs
+        self.en_passant_target = enp
+        self.zobrist_key = key
+        self.psq_score = psq_score
+        self.phase = phase
+        if move is None:
+            return  # null move
+
+        frm = move.start_row * 8 + move.start_col
+        to = move.end_row * 8 + move.end_col
+        mailbox = self.mailbox
+        c = piece.color_index
+        t = piece.kind
+        own = self.pieces[c]
+
+        # Remove whatever now stands on the target square (the promoted piece, if any)
+        landed = mailbox[to]
+        landed_bit = 1 << to
+        own[landed.kind] ^= landed_bit
+        own[t] |= 1 << frm
+        self.occupancy[c] ^= landed_bit | (1 << frm)
+        mailbox[to] = None
+        mailbox[frm] = piece
+
+        if t == KING and abs(move.end_col - move.start_col) == 2:
+            if move.end_col == 6:
+                rook_from, rook_to = to + 1, to - 1
+            else:
+                rook_from, rook_to = to - 2, to + 1
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            own[ROOK] ^= rook_bits
+            self.occupancy[c] ^= rook_bits
+            mailbox[rook_from] = mailbox[rook_to]
+            mailbox[rook_to] = None
+
+        if captured is not None:
+            bit = 1 << captured_sq
+            self.pieces[c ^ 1][captured.kind] |= bit
+            self.occupancy[c ^ 1] |= bit
+            mailbox[captured_sq] = captured
+
+    def is_square_attacked(self, row, col, by_color):
+        """
+        True if a piece of 'by_color' attacks (row, col). Same interface as Board.
+        """
+        return self._is_attacked(row * 8 + col, COLOR_INDEX[by_color])
+
+    def _is_attacked(self, sq, by, occupied=None):
+        """
+        True if side 'by' (WHITE/BLACK index) attacks square 'sq'.
+        Looks outward from the square instead of generating enemy moves.
+        'occupied' overrides the blockers, e.g. with our king lifted off the board.
+        """
+        pieces = self.pieces[by]
+        # A pawn of 'by' attacks sq if a pawn of the other color on sq would attack it back
+        if PAWN_ATTACKS[by ^ 1][sq] & pieces[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & pieces[KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & pieces[KING]:
+            return True
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        diagonal = pieces[BISHOP] | pieces[QUEEN]
+        if diagonal and bishop_attacks(sq, occupied) & diagonal:
+            return True
+        straight = pieces[ROOK] | pieces[QUEEN]
+        if straight and rook_attacks(sq, occupied) & straight:
+            return True
+        return False
+
+    def generate_legal_moves(self, color):
+        """
+        Emit legal moves directly: checkers and pinned pieces are computed
+        once, and every piece's targets are masked by the check-evasion mask
+        and its pin line. Only en passant is verified with make/undo.
+        """
+        return self._legal_moves(color, True, True)
+
+    def generate_legal_captures(self, color):
+        """
+        Legal captures, en passant and promotions.
+        """
+        return self._legal_moves(color, True, False)
+
+    def generate_legal_quiets(self, color):
+        """
+        Legal moves that neither capture nor promote, castling included.
+        """
+        return self._legal_moves(color, False, True)
+
+    def generate_staged_moves(self, color, tt_move=0, killers=(), capture_key=None, quiet_key=None):
+        """
+        Lazily yield the legal moves in search order; see movepicker.staged_moves.
+        """
+        return staged_moves(self, color, tt_move, killers, capture_key, quiet_key)
+
+    def _legal_moves(self, color, tactical, quiet):
+        """
+        Legal moves of 'color', restricted to captures, en passant and
+        promotions ('tactical') and/or the remaining moves ('quiet').
+        """
+        c = COLOR_INDEX[color]
+        pieces = self.pieces[c]
+        king_bb = pieces[KING]
+        if not king_bb:
+            # No king to protect (only in hand-made positions)
+            moves = self.generate_pseudo_legal_moves(color)
+            if tactical and quiet:
+                return moves
+            return [m for m in moves if is_tactical(m) == tactical]
+
+        mailbox = self.mailbox
+        own = self.occupancy[c]
+        enemy = self.occupancy[c ^ 1]
+        occupied = own | enemy
+        # Target squares of the requested kind: enemy pieces and/or empty squares
+        wanted = (enemy if tactical else 0) | (~occupied & FULL if quiet else 0)
+        king_sq = king_bb.bit_length() - 1
+        checkers, pins = self._checkers_and_pins(c, king_sq)
+        moves = []
+        append = moves.append
+
+        # King: target squares must be safe with the king lifted off the board
+        king = mailbox[king_sq]
+        row, col = king_sq >> 3, king_sq & 7
+        without_king = occupied ^ king_bb
+        targets = KING_ATTACKS[king_sq] & wanted
+        while targets:
+            t_bit = targets & -targets
+            targets ^= t_bit
+            to = t_bit.bit_length() - 1
+            if not self._is_attacked(to, c ^ 1, without_king):
+                append(Move(row, col, to >> 3, to & 7, king, mailbox[to]))
+
+        if checkers & (checkers - 1):
+            # Double check: only the king can move
+            return moves
+        if checkers:
+            check_mask = BETWEEN[king_sq][checkers.bit_length() - 1] | checkers
+        else:
+            check_mask = FULL
+
+        # Pawns
+        bb = pieces[PAWN]
+        if bb:
+            if c == WHITE:
+                step, start_row, last_row = -8, 6, 0
+            else:
+                step, start_row, last_row = 8, 1, 7
+            ep_bit = 0
+            if self.en_passant_target is not None:
+                ep_row, ep_col = self.en_passant_target
+                ep_bit = 1 << (ep_row * 8 + ep_col)
+            attacks = PAWN_ATTACKS[c]
+            while bb:
+                lsb = bb & -bb
+                bb ^= lsb
+                frm = lsb.bit_length() - 1
+                row, col = frm >> 3, frm & 7
+                piece = mailbox[frm]
+                allowed = check_mask & pins.get(frm, FULL)
+                to = frm + step
+                if not (occupied >> to) & 1:
+                    if (allowed >> to) & 1:
+                        if to >> 3 == last_row:
+                            if tactical:
+                                for promo in PROMOTION_CHOICES:
+                                    append(Move(row, col, to >> 3, to & 7, piece, None, promo))
+                        elif quiet:
+                            append(Move(row, col, to >> 3, to & 7, piece))
+                    to2 = to + step
+                    if (quiet and row == start_row and not (occupied >> to2) & 1
+                            and (allowed >> to2) & 1):
+                        append(Move(row, col, to2 >> 3, to2 & 7, piece))
+                if not tactical:
+                    continue
+                targets = attacks[frm] & enemy & allowed
+                while targets:
+                    t_bit = targets & -targets
+                    targets ^= t_bit
+                    to = t_bit.bit_length() - 1
+                    target = mailbox[to]
+                    if to >> 3 == last_row:
+                        for promo in PROMOTION_CHOICES:
+                            append(Move(row, col, to >> 3, to & 7, piece, target, promo))
+                    else:
+                        append(Move(row, col, to >> 3, to & 7, piece, target))
+                if attacks[frm] & ep_bit:
+                    # En passant removes two pieces from one rank: probe it
+                    to = ep_bit.bit_length() - 1
+                    move = Move(row, col, to >> 3, to & 7, piece)
+                    self.make_move(move)
+                    if not self._is_attacked(king_sq, c ^ 1):
+                        append(move)
+                    self.undo_move()
+
+        # Knights, bishops, rooks, queens
+        for t in (KNIGHT, BISHOP, ROOK, QUEEN):
+            bb = pieces[t]
+            while bb:
+                lsb = bb & -bb
+                bb ^= lsb
+                frm = lsb.bit_length() - 1
+                if t == KNIGHT:
+                    targets = KNIGHT_ATTACKS[frm]
+                elif t == BISHOP:
+                    targets = bishop_attacks(frm, occupied)
+                elif t == ROOK:
+                    targets = rook_attacks(frm, occupied)
+                else:
+                    targets = bishop_attacks(frm, occupied) | rook_attacks(frm, occupied)
+                targets &= wanted & check_mask
+                if frm in pins:
+                    targets &= pins[frm]
+                row, col = frm >> 3, frm & 7
+                piece = mailbox[frm]
+                while targets:
+                    t_bit = targets & -targets
+                    targets ^= t_bit
+                    to = t_bit.bit_length() - 1
+                    append(Move(row, col, to >> 3, to & 7, piece, mailbox[to]))
+
+        if quiet and not checkers:
+            moves.extend(self.generate_castling_moves(color))
+        return moves
+
+    def _checkers_and_pins(self, c, king_sq):
+        """
+        Return (bitboard of enemy pieces giving check,
+                {square of pinned piece: bitboard of its pin line}).
+        """
+        enemy = self.pieces[c ^ 1]
+        own_occ = self.occupancy[c]
+        enemy_occ = self.occupancy[c ^ 1]
+        occupied = own_occ | enemy_occ
+
+        checkers = (KNIGHT_ATTACKS[king_sq] & enemy[KNIGHT]) | (PAWN_ATTACKS[c][king_sq] & enemy[PAWN])
+
+        # Sliders seen from the king through our own pieces (enemy pieces still block)
+        diagonal = enemy[BISHOP] | enemy[QUEEN]
+        straight = enemy[ROOK] | enemy[QUEEN]
+        snipers = 0
+        if diagonal:
+            snipers |= bishop_attacks(king_sq, enemy_occ) & diagonal
+        if straight:
+            snipers |= rook_attacks(king_sq, enemy_occ) & straight
+
+        pins = {}
+        between_from_king = BETWEEN[king_sq]
+        while snipers:
+            bit = snipers & -snipers
+            snipers ^= bit
+            sniper_sq = bit.bit_length() - 1
+            between = between_from_king[sniper_sq]
+            blockers = between & occupied
+            if not blockers:
+                checkers |= bit
+            elif not blockers & (blockers - 1):
+                # Exactly one of our pieces in the way: it is pinned
+                pins[blockers.bit_length() - 1] = between | bit
+        return checkers, pins
+
+    def generate_pseudo_legal_moves(self, color):
+        """
+        Collect all moves based on piece movement rules, including castling
+        (which is already fully checked for attacked squares).
+        """
+        c = COLOR_INDEX[color]
+        pieces = self.pieces[c]
+        mailbox = self.mailbox
+        own = self.occupancy[c]
+        enemy = self.occupancy[c ^ 1]
+        occupied = own | enemy
+        not_own = ~own & FULL
+        moves = []
+        append = moves.append
+
+        # Pawns
+        bb = pieces[PAWN]
+        if bb:
+            if c == WHITE:
+                step, start_row, last_row = -8, 6, 0
+            else:
+                step, start_row, last_row = 8, 1, 7
+            ep_bit = 0
+            if self.en_passant_target is not None:
+                ep_row, ep_col = self.en_passant_target
+                ep_bit = 1 << (ep_row * 8 + ep_col)
+            attacks = PAWN_ATTACKS[c]
+            while bb:
+                lsb = bb & -bb
+                bb ^= lsb
+                frm = lsb.bit_length() - 1
+                row, col = frm >> 3, frm & 7
+                piece = mailbox[frm]
+                to = frm + step
+                if not (occupied >> to) & 1:
+                    if to >> 3 == last_row:
+                        for promo in PROMOTION_CHOICES:
+                            append(Move(row, col, to >> 3, to & 7, piece, None, promo))
+                    else:
+                        append(Move(row, col, to >> 3, to & 7, piece))
+                        if row == start_row and not (occupied >> (to + step)) & 1:
+                            to2 = to + step
+                            append(Move(row, col, to2 >> 3, to2 & 7, piece))
+                targets = attacks[frm] & (enemy | ep_bit)
+                while targets:
+                    t_bit = targets & -targets
+                    targets ^= t_bit
+                    to = t_bit.bit_length() - 1
+                    target = mailbox[to]
+                    if to >> 3 == last_row:
+                        for promo in PROMOTION_CHOICES:
+                            append(Move(row, col, to >> 3, to & 7, piece, target, promo))
+                    else:
+                        append(Move(row, col, to >> 3, to & 7, piece, target))
+
+        # Knights, bishops, rooks, queens, king
+        for t in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            bb = pieces[t]
+            while bb:
+                lsb = bb & -bb
+                bb ^= lsb
+                frm = lsb.bit_length() - 1
+                if t == KNIGHT:
+                    targets = KNIGHT_ATTACKS[frm]
+                elif t == BISHOP:
+                    targets = bishop_attacks(frm, occupied)
+                elif t == ROOK:
+                    targets = rook_attacks(frm, occupied)
+                elif t == QUEEN:
+                    targets = bishop_attacks(frm, occupied) | rook_attacks(frm, occupied)
+                else:
+                    targets = KING_ATTACKS[frm]
+                targets &= not_own
+                row, col = frm >> 3, frm & 7
+                piece = mailbox[frm]
+                while targets:
+                    t_bit = targets & -targets
+                    targets ^= t_bit
+                    to = t_bit.bit_length() - 1
+                    append(Move(row, col, to >> 3, to & 7, piece, mailbox[to]))
+
+        moves.extend(self.generate_castling_moves(color))
+        return moves
+
+    def generate_castling_moves(self, color):
+        """
+        The king may not castle out of, through or into check.
+        """
+        moves = []
+        c = COLOR_INDEX[color]
+        if c == WHITE:
+            kingside = self.white_can_castle_kingside
+            queenside = self.white_can_castle_queenside
+            row = 7
+        else:
+            kingside = self.black_can_castle_kingside
+            queenside = self.black_can_castle_queenside
+            row = 0
+        if not (kingside or queenside):
+            return moves
+        king_sq = row * 8 + 4
+        if not (self.pieces[c][KING] >> king_sq) & 1:
+            return moves
+        if self._is_attacked(king_sq, c ^ 1):
+            return moves
+
+        occupied = self.occupancy[0] | self.occupancy[1]
+        rooks = self.pieces[c][ROOK]
+        king = self.mailbox[king_sq]
+        if (kingside and (rooks >> (king_sq + 3)) & 1
+                and not (occupied >> (king_sq + 1)) & 3
+                and not self._is_attacked(king_sq + 1, c ^ 1)
+                and not self._is_attacked(king_sq + 2, c ^ 1)):
+            moves.append(Move(row, 4, row, 6, king))
+        if (queenside and (rooks >> (king_sq - 4)) & 1
+                and not (occupied >> (king_sq - 3)) & 7
+                and not self._is_attacked(king_sq - 1, c ^ 1)
+                and not self._is_attacked(king_sq - 2, c ^ 1)):
+            moves.append(Move(row, 4, row, 2, king))
+        return moves
+
+    def is_in_check(self, color):
+        c = COLOR_INDEX[color]
+        king_bb = self.pieces[c][KING]
+        if not king_bb:
+            return False
+        return self._is_attacked(king_bb.bit_length() - 1, c ^ 1)
+
+    def is_checkmate(self, color):
+        if not self.is_in_check(color):
+            return False
+        return len(self.generate_legal_moves(color)) == 0
+
+    def is_stalemate(self, color):
+        if self.is_in_check(color):
+            return False
+        return len(self.generate_legal_moves(color)) == 0
+
+    def piece_count(self):
+        """
+        Number of pieces on the board, kings included.
+        """
+        return bin(self.occupancy[WHITE] | self.occupancy[BLACK]).count("1")
+
+    def has_non_pawn_material(self, color):
+        """
+        True if 'color' has a knight, bishop, rook or queen.
+        """
+        own = self.pieces[COLOR_INDEX[color]]
+        return bool(own[KNIGHT] | own[BISHOP] | own[ROOK] | own[QUEEN])
+
+    def get_pieces(self, color=None):
+        """
+        Return [(row, col, piece), ...] for every piece of 'color' (both colors if None).
+        """
+        if color:
+            bb = self.occupancy[COLOR_INDEX[color]]
+        else:
+            bb = self.occupancy[WHITE] | self.occupancy[BLACK]
+        result = []
+        mailbox = self.mailbox
+        while bb:
+            lsb = bb & -bb
+            bb ^= lsb
+            sq = lsb.bit_length() - 1
+            result.append((sq >> 3, sq & 7, mailbox[sq]))
+        return result
+
+    def find_king(self, color):
+        """
+        Return (row,col) of the king of 'color', or (None,None) if not found.
+        """
+        king_bb = self.pieces[COLOR_INDEX[color]][KING]
+        if not king_bb:
+            return (None, None)
+        sq = king_bb.bit_length() - 1
+        return (sq >> 3, sq & 7)
+
+    def __str__(self):
+        board_str = ""
+        for row in range(8):
+            rank_str = f"{8 - row} "
+            for col in range(8):
+                piece = self.mailbox[row * 8 + col]
+                rank_str += f"{str(piece) if piece else '.'} "
+            board_str += rank_str + "\n"
+        board_str += "  a b c d e f g h\n"
+        return board_str
@@ -1,10 +1,67 @@
 from move import Move
-from pieces.pawn import Pawn
+from pieces.pawn import Pawn, PROMOTION_CHOICES
 from pieces.rook import Rook
 from pieces.knight import Knight
 from pieces.bishop import Bishop
 from pieces.queen import Queen
 from pieces.king import King
+from pieces.piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, COLOR_INDEX
+from evaluator import PSQ, PHASE_WEIGHTS, psq_totals
+from zobrist import PIECE_SQUARE_KEYS, SIDE_KEY, compute_key, state_key
+from fen import load_fen, board_to_fen
+from movepicker import is_tactical, staged_moves
+
+
+def _build_jumps(offsets):
+    """
+    For each square index (row*8 + col), the on-board squares reached by 'offsets'.
+    """
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        table.append([(row + dr, col + dc) for dr, dc in offsets
+                      if 0 <= row + dr < 8 and 0 <= col + dc < 8])
+    return table
+
+
+def _build_rays(directions):
+    """
+    For each square index, one list of squares per direction, ordered
+    outward from the square, so a scan can stop at the first blocker.
+    """
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        rays = []
+        for dr, dc in directions:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append((r, c))
+                r += dr
+                c += dc
+            if ray:
+                rays.append(ray)
+        table.append(rays)
+    return table
+
+
+KNIGHT_JUMPS = _build_jumps([(2, 1), (2, -1), (-2, 1), (-2, -1),
+                             (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_STEPS = _build_jumps([(1, 0), (-1, 0), (0, 1), (0, -1),
+                           (1, 1), (1, -1), (-1, 1), (-1, -1)])
+# Squares a pawn of the given color would have to stand on to attack a square:
+# White pawns attack upwards (row - 1), so they sit one row below the target.
+PAWN_ATTACKERS = {
+    "WHITE": _build_jumps([(1, -1), (1, 1)]),
+    "BLACK": _build_jumps([(-1, -1), (-1, 1)]),
+}
+STRAIGHT_RAYS = _build_rays([(1, 0), (-1, 0), (0, 1), (0, -1)])
+DIAGONAL_RAYS = _build_rays([(1, 1), (1, -1), (-1, 1), (-1, -1)])
+
+PROMOTION_CLASSES = {'q': Queen, 'r': Rook, 'b': Bishop, 'n': Knight,
+                     'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
+
 
 class Board:
     def __init__(self):
@@ -25,6 +82,24 @@ class Board:
 
         # Move history for undo
         self.move_history = []
+        # Side to move and move counters of the position the history starts
+        # from (set by load_fen), for to_fen()
+        self.start_color = "WHITE"
+        self.start_halfmove_clock = 0
+        self.start_fullmove_number = 1
+
+        # Occupied squares (row*8 + col) per color and each king's (row, col),
+        # kept up to date by _put so nothing has to scan all 64 squares
+        self.piece_squares = {"WHITE": set(), "BLACK": set()}
+        self.king_squares = {"WHITE": (None, None), "BLACK": (None, None)}
+
+        # Material + piece-square score (packed middlegame/endgame, see
+        # evaluator.py) and game phase, also kept up to date by _put
+        self.psq_score = 0
+        self.phase = 0
+
+        # 64-bit Zobrist hash of the position, updated by make_move/undo_move
+        self.zobrist_key = compute_key(self)
 
     def _create_empty_board(self):
         """
@@ -32,6 +107,23 @@ class Board:
         """
         return [[None for _ in range(8)] for _ in range(8)]
 
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        A new board set up from a FEN string, including castling rights,
+        en passant square, side to move and move counters.
+        """
+        board = cls()
+        load_fen(board, fen)
+        return board
+
+    def to_fen(self):
+        """
+        FEN string of the current position (side to move and move counters
+        follow from the FEN it was loaded from and the moves made since).
+        """
+        return board_to_fen(self)
+
     def setup_initial_position(self):
         # Clear board
         self.squares = [[None]*8 for _ in range(8)]
@@ -76,11 +168,29 @@ class Board:
         # Black king on row=0, col=4
         self.squares[0][4] = King("BLACK")
 
+        self._rebuild_piece_lists()
+        self.zobrist_key = compute_key(self)
+
+    def _rebuild_piece_lists(self):
+        """
+        Recompute piece_squares, king_squares and the evaluation totals from self.squares.
+        """
+        self.piece_squares = {"WHITE": set(), "BLACK": set()}
+        self.king_squares = {"WHITE": (None, None), "BLACK": (None, None)}
+        for row in range(8):
+            for col in range(8):
+                piece = self.squares[row][col]
+                if piece:
+                    self.piece_squares[piece.color].add(row * 8 + col)
+                    if piece.kind == KING:
+                        self.king_squares[piece.color] = (row, col)
+        self.psq_score, self.phase = psq_totals(self)
+
 
     def parse_move_string(self, move_str, color):
         """
-        Given a string like 'e2e4', convert to a Move object.
-        If invalid format, return None.
+        Given a string like 'e2e4' (or 'e7e8q' for a promotion), convert to a
+        Move object. If invalid format, return None.
         """
         if len(move_str) < 4:
             return None
@@ -103,12 +213,38 @@ class Board:
             return None
 
         piece_captured = self.squares[end_row][end_col]
-        return Move(start_row, start_col, end_row, end_col, piece_moved, piece_captured)
+        promotion = move_str[4].lower() if len(move_str) > 4 else None
+        if promotion is not None and promotion not in PROMOTION_CHOICES:
+            return None
+        return Move(start_row, start_col, end_row, end_col, piece_moved, piece_captured, promotion)
 
     def get_piece_at(self, row, col):
         return self.squares[row][col]
 
     def set_piece_at(self, row, col, piece):
+        self._put(row, col, piece)
+
+    def _put(self, row, col, piece):
+        """
+        Place 'piece' (or None) on a square, XOR the change into the Zobrist
+        key and keep the piece lists, king squares and evaluation totals in sync.
+        """
+        sq = row * 8 + col
+        old = self.squares[row][col]
+        if old is not None:
+            self.zobrist_key ^= PIECE_SQUARE_KEYS[old.color_index][old.kind][sq]
+            self.psq_score -= PSQ[old.color_index][old.kind][sq]
+            self.phase -= PHASE_WEIGHTS[old.kind]
+            self.piece_squares[old.color].discard(sq)
+            if old.kind == KING and self.king_squares[old.color] == (row, col):
+                self.king_squares[old.color] = (None, None)
+        if piece is not None:
+            self.zobrist_key ^= PIECE_SQUARE_KEYS[piece.color_index][piece.kind][sq]
+            self.psq_score += PSQ[piece.color_index][piece.kind][sq]
+            self.phase += PHASE_WEIGHTS[piece.kind]
+            self.piece_squares[piece.color].add(sq)
+            if piece.kind == KING:
+                self.king_squares[piece.color] = (row, col)
         self.squares[row][col] = piece
 
     def is_legal_move(self, move, color):
@@ -131,77 +267,72 @@ class Board:
         start_piece = move.piece_moved
         self.move_history.append((move, self.white_can_castle_kingside, self.white_can_castle_queenside,
                                   self.black_can_castle_kingside, self.black_can_castle_queenside,
-                                  self.en_passant_target))
-        
-        self.squares[move.end_row][move.end_col] = start_piece
-        self.squares[move.start_row][move.start_col] = None
+                                  self.en_passant_target, self.zobrist_key))
+
+        # Castling rights and en passant are re-hashed as a whole once the move is done
+        self.zobrist_key ^= state_key(self) ^ SIDE_KEY
+
+        self._put(move.end_row, move.end_col, start_piece)
+        self._put(move.start_row, move.start_col, None)
 
         self.handle_special_moves(move)
 
+        self.zobrist_key ^= state_key(self)
+
     def handle_special_moves(self, move):
         piece = move.piece_moved
         start_row, start_col = move.start_row, move.start_col
         end_row, end_col = move.end_row, move.end_col
 
         self.en_passant_target = None
+        kind = piece.kind
 
         # Pawn-specific logic
-        if isinstance(piece, Pawn):
+        if kind == PAWN:
             # En passant capture
             # If we moved diagonally to an empty square that was the en_passant_target
             if (start_col != end_col and move.piece_captured is None):
                 # So the captured pawn must be behind end_row
                 captured_row = start_row  # The pawn is on the row we started from
-                self.squares[captured_row][end_col] = None
+                self._put(captured_row, end_col, None)
 
             # If the pawn moved two squares, set en_passant_target
             if abs(end_row - start_row) == 2:
                 # This is the row *between* start_row & end_row
-                row_direction = 1 if piece.color == "BLACK" else -1
-                self.en_passant_target = (end_row + row_direction, end_col)
+                self.en_passant_target = ((start_row + end_row) // 2, end_col)
 
             # Promotion
-            if (end_row == 0 and piece.color == "WHITE") or (end_row == 7 and piece.color == "BLACK"):
-                if move.promotion:
-                    promo_char = move.promotion.upper()  # 'Q', 'R', 'N', 'B'
-                    if promo_char == 'Q':
-                        self.squares[end_row][end_col] = Queen(piece.color)
-                    elif promo_char == 'R':
-                        self.squares[end_row][end_col] = Rook(piece.color)
-                    elif promo_char == 'N':
-                        self.squares[end_row][end_col] = Knight(piece.color)
-                    elif promo_char == 'B':
-                        self.squares[end_row][end_col] = Bishop(piece.color)
-                else:
-                    # Default to queen if none specified
-                    self.squares[end_row][end_col] = Queen(piece.color)
+            if end_row == 0 or end_row == 7:
+                # Default to queen if none specified
+                promo_class = PROMOTION_CLASSES.get(move.promotion, Queen)
+                self._put(end_row, end_col, promo_class(piece.color))
 
         # Castling            
-        if isinstance(piece, King):
+        if kind == KING:
             # If king moves two squares horizontally, it's castling
             if abs(end_col - start_col) == 2:
                 # King side or queen side?
                 if end_col == 6:  # King-side (short) castling
                     # Move the rook from col 7 to col 5
                     rook = self.squares[end_row][7]
-                    self.squares[end_row][5] = rook
-                    self.squares[end_row][7] = None
+                    self._put(end_row, 5, rook)
+                    self._put(end_row, 7, None)
                 else:  # end_col == 2 => Queen-side
                     rook = self.squares[end_row][0]
-                    self.squares[end_row][3] = rook
-                    self.squares[end_row][0] = None
+                    self._put(end_row, 3, rook)
+                    self._put(end_row, 0, None)
 
         # If we move a king or rook, update castling rights
-        if isinstance(piece, King):
-            if piece.color == "WHITE":
+        if kind == KING:
+            if piece.color_index == WHITE:
                 self.white_can_castle_kingside = False
                 self.white_can_castle_queenside = False
             else:
                 self.black_can_castle_kingside = False
                 self.black_can_castle_queenside = False
 
-        if isinstance(piece, Rook):
-            if piece.color == "WHITE":
+        if kind == ROOK:
+            if piece.color_index == WHITE:
                 if start_row == 7 and start_col == 7:
                     self.white_can_castle_kingside = False
                 if start_row == 7 and start_col == 0:
@@ -212,102 +343,429 @@ class Board:
                 if start_row == 0 and start_col == 0:
                     self.black_can_castle_queenside = False
 
+        # Capturing a rook on its home square also removes that castling right
+        if move.piece_captured is not None and move.piece_captured.kind == ROOK:
+            if end_row == 7 and end_col == 7:
+                self.white_can_castle_kingside = False
+            elif end_row == 7 and end_col == 0:
+                self.white_can_castle_queenside = False
+            elif end_row == 0 and end_col == 7:
+                self.black_can_castle_kingside = False
+            elif end_row == 0 and end_col == 0:
+                self.black_can_castle_queenside = False
+
+    def make_null_move(self):
+        """
+        Pass the turn without moving a piece (used by null-move pruning).
+        Only the en passant square and the side to move change; undo it
+        with undo_move() like any other move.
+        """
+        self.move_history.append((None, self.white_can_castle_kingside, self.white_can_castle_queenside,
+                                  self.black_can_castle_kingside, self.black_can_castle_queenside,
+                                  self.en_passant_target, self.zobrist_key))
+        self.zobrist_key ^= state_key(self) ^ SIDE_KEY
+        self.en_passant_target = None
+        self.zobrist_key ^= state_key(self)
+
     def undo_move(self):
         if not self.move_history:
             return
         (move,
          w_cks, w_cqs,
          b_cks, b_cqs,
-         enp) = self.move_history.pop()
+         enp, key) = self.move_history.pop()
         self.white_can_castle_kingside = w_cks
         self.white_can_castle_queenside = w_cqs
         self.black_can_castle_kingside = b_cks
         self.black_can_castle_queenside = b_cqs
         self.en_passant_target = enp
+        if move is None:
+            # Null move: nothing moved on the board
+            self.zobrist_key = key
+            return
 
         start_row, start_col = move.start_row, move.start_col
         end_row, end_col = move.end_row, move.end_col
-        self.squares[start_row][start_col] = move.piece_moved
-        self.squares[end_row][end_col] = move.piece_captured
+        self._put(start_row, start_col, move.piece_moved)
+        self._put(end_row, end_col, move.piece_captured)
+
+        kind = move.piece_moved.kind
 
         # Special handling for undoing castling
-        if isinstance(move.piece_moved, King) and abs(end_col - start_col) == 2:
+        if kind == KING and abs(end_col - start_col) == 2:
             # Moved two squares => castling
             if end_col == 6:
                 # Rook from col 5 back to col 7
                 rook = self.squares[end_row][5]
-                self.squares[end_row][7] = rook
-                self.squares[end_row][5] = None
+                self._put(end_row, 7, rook)
+                self._put(end_row, 5, None)
             else:
                 # Rook from col 3 back to col 0
                 rook = self.squares[end_row][3]
-                self.squares[end_row][0] = rook
-                self.squares[end_row][3] = None
+                self._put(end_row, 0, rook)
+                self._put(end_row, 3, None)
 
         # Special undo for en passant
         # If we captured a pawn en passant, the captured piece would be at move.start_row, end_col
-        if isinstance(move.piece_moved, Pawn):
-            if move.piece_captured is None and (move.start_col != move.end_col):
-                # So we must restore the captured pawn
-                row_direction = 1 if move.piece_moved.color == "WHITE" else -1
-                self.squares[move.end_row][move.end_col] = None
-                self.squares[move.start_row][move.end_col] = Pawn("WHITE" if move.piece_moved.color == "BLACK" else "BLACK")
-
-        # Special undo for promotion
-        if isinstance(move.piece_moved, Pawn):
-            # If end square is a Queen/Bishop/Rook/Knight of same color, revert to a pawn
-            piece_now = self.squares[start_row][start_col]
-            if not isinstance(piece_now, Pawn):
-                # Revert to a Pawn
-                self.squares[start_row][start_col] = Pawn(piece_now.color)
+        # (A promotion needs nothing more: the pawn went back to the start
+        # square above and the captured piece or None replaced the new piece.)
+        if kind == PAWN and move.piece_captured is None and start_col != end_col:
+            # So we must restore the captured pawn
+            self._put(start_row, end_col, Pawn("WHITE" if move.piece_moved.color == "BLACK" else "BLACK"))
+
+        # The square updates above re-hashed the position; restore the exact saved key
+        self.zobrist_key = key
 
     def generate_legal_moves(self, color):
         """
         Filter out moves that leave your own king in check.
-        This uses the 'make_move -> is_in_check -> undo_move' approach
-        to detect pins, etc.
+        Checkers and pinned pieces are found once per position, so most
+        moves are accepted or rejected by a mask test. Only en passant,
+        which can uncover a check along the rank, still uses
+        'make_move -> is_in_check -> undo_move'.
         """
+        return self._legal_moves(color, True, True)
+
+    def generate_legal_captures(self, color):
+        """
+        Legal captures, en passant and promotions.
+        """
+        return self._legal_moves(color, True, False)
+
+    def generate_legal_quiets(self, color):
+        """
+        Legal moves that neither capture nor promote, castling included.
+        """
+        return self._legal_moves(color, False, True)
+
+    def generate_staged_moves(self, color, tt_move=0, killers=(), capture_key=None, quiet_key=None):
+        """
+        Lazily yield the legal moves in search order: TT move, captures,
+        killers, quiet moves. See movepicker.staged_moves.
+        """
+        return staged_moves(self, color, tt_move, killers, capture_key, quiet_key)
+
+    def _legal_moves(self, color, tactical, quiet):
+        """
+        Legal moves of 'color', restricted to captures, en passant and
+        promotions ('tactical') and/or the remaining moves ('quiet').
+        """
+        king_row, king_col = self.find_king(color)
+        if king_row is None:
+            # No king to protect (only in hand-made positions)
+            moves = self.generate_pseudo_legal_moves(color) + self.generate_castling_moves(color)
+            if tactical and quiet:
+                return moves
+            return [m for m in moves if is_tactical(m) == tactical]
+
+        enemy_color = "BLACK" if color == "WHITE" else "WHITE"
+        squares = self.squares
+        king = squares[king_row][king_col]
+        num_checkers, check_mask, pins = self._checks_and_pins(color, king_row, king_col)
+
+        if num_checkers > 1:
+            # Double check: only the king can move
+            pseudo_moves = king.get_legal_moves(self, king_row, king_col)
+            if not (tactical and quiet):
+                pseudo_moves = [m for m in pseudo_moves if is_tactical(m) == tactical]
+        elif tactical and quiet:
+            pseudo_moves = self.generate_pseudo_legal_moves(color)
+        else:
+            pseudo_moves = self._pseudo_moves(color, tactical, quiet)
+
         legal_moves = []
-        pseudo_moves = self.generate_pseudo_legal_moves(color)
         for move in pseudo_moves:
-            self.make_move(move)
-            if not self.is_in_check(color):
-                legal_moves.append(move)
-            self.undo_move()
+            piece = move.piece_moved
+            if piece is king:
+                # Lift the king so sliders see through the square it leaves
+                squares[king_row][king_col] = None
+                attacked = self.is_square_attacked(move.end_row, move.end_col, enemy_color)
+                squares[king_row][king_col] = king
+                if not attacked:
+                    legal_moves.append(move)
+                continue
+
+            if (move.piece_captured is None and move.start_col != move.end_col
+                    and piece.kind == PAWN):
+                # En passant removes two pieces from the rank: probe it
+                self.make_move(move)
+                if not self.is_in_check(color):
+                    legal_moves.append(move)
+                self.undo_move()
+                continue
+
+            to_bit = 1 << (move.end_row * 8 + move.end_col)
+            if num_checkers and not check_mask & to_bit:
+                continue
+            pin_mask = pins.get((move.start_row, move.start_col))
+            if pin_mask is not None and not pin_mask & to_bit:
+                continue
+            legal_moves.append(move)
+
+        if quiet and not num_checkers:
+            legal_moves.extend(self.generate_castling_moves(color))
         return legal_moves
 
+    def _checks_and_pins(self, color, king_row, king_col):
+        """
+        Look outward from the king once and return
+        (number of checkers, check mask, pins):
+        - check mask: bit (row*8 + col) set for every square that blocks or
+          captures the single checker
+        - pins: {(row, col) of a pinned piece: mask of squares on its pin line}
+        """
+        squares = self.squares
+        enemy_color = "BLACK" if color == "WHITE" else "WHITE"
+        own = COLOR_INDEX[color]
+        enemy = own ^ 1
+        sq = king_row * 8 + king_col
+        num_checkers = 0
+        check_mask = 0
+        pins = {}
+
+        for r, c in KNIGHT_JUMPS[sq]:
+            piece = squares[r][c]
+            if piece is not None and piece.kind == KNIGHT and piece.color_index == enemy:
+                num_checkers += 1
+                check_mask |= 1 << (r * 8 + c)
+
+        for r, c in PAWN_ATTACKERS[enemy_color][sq]:
+            piece = squares[r][c]
+            if piece is not None and piece.kind == PAWN and piece.color_index == enemy:
+                num_checkers += 1
+                check_mask |= 1 << (r * 8 + c)
+
+        for rays, slider in ((DIAGONAL_RAYS[sq], BISHOP), (STRAIGHT_RAYS[sq], ROOK)):
+            for ray in rays:
+                ray_mask = 0
+                blocker = None
+                for r, c in ray:
+                    ray_mask |= 1 << (r * 8 + c)
+                    piece = squares[r][c]
+                    if piece is None:
+                        continue
+                    if piece.color_index == own:
+                        if blocker is not None:
+                            break  # two of our pieces: nothing pinned on this ray
+                        blocker = (r, c)
+                        continue
+                    if piece.kind == slider or piece.kind == QUEEN:
+                        if blocker is None:
+                            num_checkers += 1
+                            check_mask |= ray_mask
+                        else:
+                            pins[blocker] = ray_mask
+                    break
+
+        return num_checkers, check_mask, pins
+
+    def generate_castling_moves(self, color):
+        """
+        Castling is generated separately from the pieces because it needs
+        attack information: the king may not castle out of, through or into check.
+        """
+        moves = []
+        row = 7 if color == "WHITE" else 0
+        king = self.squares[row][4]
+        if king is None or king.kind != KING or king.color != color:
+            return moves
+        if color == "WHITE":
+            kingside = self.white_can_castle_kingside
+            queenside = self.white_can_castle_queenside
+        else:
+            kingside = self.black_can_castle_kingside
+            queenside = self.black_can_castle_queenside
+        if not (kingside or queenside):
+            return moves
+
+        enemy_color = "BLACK" if color == "WHITE" else "WHITE"
+        if self.is_square_attacked(row, 4, enemy_color):
+            return moves
+
+        rook = self.squares[row][7]
+        if kingside and rook is not None and rook.kind == ROOK:
+            if self.squares[row][5] is None and self.squares[row][6] is None:
+                if (not self.is_square_attacked(row, 5, enemy_color)
+                        and not self.is_square_attacked(row, 6, enemy_color)):
+                    moves.append(Move(row, 4, row, 6, king))
+
+        rook = self.squares[row][0]
+        if queenside and rook is not None and rook.kind == ROOK:
+            if (self.squares[row][1] is None and self.squares[row][2] is None
+                    and self.squares[row][3] is None):
+                if (not self.is_square_attacked(row, 3, enemy_color)
+                        and not self.is_square_attacked(row, 2, enemy_color)):
+                    moves.append(Move(row, 4, row, 2, king))
+        return moves
+
+    def is_square_attacked(self, row, col, by_color):
+        """
+        True if a piece of 'by_color' attacks (row, col).
+        Instead of generating the enemy's moves, look outward from the square:
+        knight and king jumps, the two pawn squares, then each sliding ray
+        up to its first piece.
+        """
+        squares = self.squares
+        sq = row * 8 + col
+        by = COLOR_INDEX[by_color]
+
+        for r, c in KNIGHT_JUMPS[sq]:
+            piece = squares[r][c]
+            if piece is not None and piece.kind == KNIGHT and piece.color_index == by:
+                return True
+
+        for r, c in PAWN_ATTACKERS[by_color][sq]:
+            piece = squares[r][c]
+            if piece is not None and piece.kind == PAWN and piece.color_index == by:
+                return True
+
+        for r, c in KING_STEPS[sq]:
+            piece = squares[r][c]
+            if piece is not None and piece.kind == KING and piece.color_index == by:
+                return True
+
+        for ray in DIAGONAL_RAYS[sq]:
+            for r, c in ray:
+                piece = squares[r][c]
+                if piece is not None:
+                    if piece.color_index == by and (piece.kind == BISHOP or piece.kind == QUEEN):
+                        return True
+                    break
+
+        for ray in STRAIGHT_RAYS[sq]:
+            for r, c in ray:
+                piece = squares[r][c]
+                if piece is not None:
+                    if piece.color_index == by and (piece.kind == ROOK or piece.kind == QUEEN):
+                        return True
+                    break
+
+        return False
+
     def is_in_check(self, color):
         """
-        Return True if 'color' king can be captured by an enemy piece right now.
-        1) find the king position
-        2) generate pseudo-legal moves of the enemy
-        3) if any end-square is king's square => check
+        Return True if 'color' king is attacked by an enemy piece right now.
         """
         king_row, king_col = self.find_king(color)
         if king_row is None:
             # No king found (unlikely in normal play)
             return False
         enemy_color = "BLACK" if color == "WHITE" else "WHITE"
-        enemy_moves = self.generate_pseudo_legal_moves(enemy_color)
-        for m in enemy_moves:
-            if (m.end_row, m.end_col) == (king_row, king_col):
-                return True
-        return False
-    
+        return self.is_square_attacked(king_row, king_col, enemy_color)
+
     def generate_pseudo_legal_moves(self, color):
         """
         Collect all moves based on piece movement rules,
         ignoring whether the king is left in check.
         """
         moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.squares[row][col]
-                if piece and piece.color == color:
-                    piece_moves = piece.get_legal_moves(self, row, col)
-                    moves.extend(piece_moves)
+        squares = self.squares
+        for sq in self.piece_squares[color]:
+            row, col = sq >> 3, sq & 7
+            moves.extend(squares[row][col].get_legal_moves(self, row, col))
         return moves
+
+    def _pseudo_moves(self, color, tactical, quiet):
+        """
+        Pseudo-legal moves read from the jump and ray tables, restricted like
+        _legal_moves, so a capture-only request never builds a quiet Move.
+        Castling is not included.
+        """
+        squares = self.squares
+        own = COLOR_INDEX[color]
+        moves = []
+        append = moves.append
+        for sq in self.piece_squares[color]:
+            row, col = sq >> 3, sq & 7
+            piece = squares[row][col]
+            kind = piece.kind
+
+            if kind == PAWN:
+                if own == WHITE:
+                    direction, start_row, last_row = -1, 6, 0
+                else:
+                    direction, start_row, last_row = 1, 1, 7
+                r = row + direction
+                if squares[r][col] is None:
+                    if r == last_row:
+                        if tactical:
+                            for promo in PROMOTION_CHOICES:
+                                append(Move(row, col, r, col, piece, None, promo))
+                    elif quiet:
+                        append(Move(row, col, r, col, piece))
+                        if row == start_row and squares[r + direction][col] is None:
+                            append(Move(row, col, r + direction, col, piece))
+                if tactical:
+                    for c in (col - 1, col + 1):
+                        if 0 <= c < 8:
+                            target = squares[r][c]
+                            if target is not None:
+                                if target.color_index != own:
+                                    if r == last_row:
+                                        for promo in PROMOTION_CHOICES:
+                                            append(Move(row, col, r, c, piece, target, promo))
+                                    else:
+                                        append(Move(row, col, r, c, piece, target))
+                            elif (r, c) == self.en_passant_target:
+                                append(Move(row, col, r, c, piece))
+                continue
+
+            if kind == KNIGHT or kind == KING:
+                for r, c in (KNIGHT_JUMPS if kind == KNIGHT else KING_STEPS)[sq]:
+                    target = squares[r][c]
+                    if target is None:
+                        if quiet:
+                            append(Move(row, col, r, c, piece))
+                    elif tactical and target.color_index != own:
+                        append(Move(row, col, r, c, piece, target))
+                continue
+
+            if kind == ROOK:
+                rays = STRAIGHT_RAYS[sq]
+            elif kind == BISHOP:
+                rays = DIAGONAL_RAYS[sq]
+            else:
+                rays = STRAIGHT_RAYS[sq] + DIAGONAL_RAYS[sq]
+            for ray in rays:
+                for r, c in ray:
+                    target = squares[r][c]
+                    if target is None:
+                        if quiet:
+                            append(Move(row, col, r, c, piece))
+                        continue
+                    if tactical and target.color_index != own:
+                        append(Move(row, col, r, c, piece, target))
+                    break
+        return moves
+
+    def get_pieces(self, color=None):
+        """
+        Return [(row, col, piece), ...] for every piece of 'color' (both colors
+        if None), read from the piece lists instead of scanning the board.
+        """
+        colors = (color,) if color else ("WHITE", "BLACK")
+        squares = self.squares
+        return [(sq >> 3, sq & 7, squares[sq >> 3][sq & 7])
+                for c in colors for sq in self.piece_squares[c]]
     
+    def piece_count(self):
+        """
+        Number of pieces on the board, kings included.
+        """
+        return len(self.piece_squares["WHITE"]) + len(self.piece_squares["BLACK"])
+
+    def has_non_pawn_material(self, color):
+        """
+        True if 'color' has a knight, bishop, rook or queen. Null-move
+        pruning is unsafe without one (king and pawn endings are full of zugzwang).
+        """
+        squares = self.squares
+        for sq in self.piece_squares[color]:
+            kind = squares[sq >> 3][sq & 7].kind
+            if kind != PAWN and kind != KING:
+                return True
+        return False
+
     def is_checkmate(self, color):
         if not self.is_in_check(color):
             return False
@@ -324,14 +782,7 @@ class Board:
         """
         Return (row,col) of the king of 'color', or (None,None) if not found.
         """
-        for r in range(8):
-            for c in range(8):
-                piece = self.squares[r][c]
-                if piece and piece.color == color:
-                    # If str(piece).upper() == 'K' or isinstance(piece, King)
-                    if isinstance(piece, King):
-                        return (r,c)
-        return (None, None)
+        return self.king_squares[color]
 
     def __str__(self):
         board_str = ""
@@ -0,0 +1,269 @@
+# book.py
+
+import argparse
+import mmap
+import random
+import re
+import struct
+import sys
+
+from engines import ENGINES, opponent
+from fen import load_fen
+from notation import move_to_san, normalize_san, square_name
+from pieces.piece import KING
+from polyglot import polyglot_key
+
+# Polyglot .bin layout: 16-byte big-endian entries sorted by key
+#   key (8 bytes), move (2), weight (2), learn (4)
+# Book moves: bits 0-2 to file, 3-5 to rank, 6-8 from file, 9-11 from rank,
+# 12-14 promotion (1 knight, 2 bishop, 3 rook, 4 queen). Castling is stored
+# as the king capturing its own rook (e1h1 for e1g1).
+ENTRY = struct.Struct(">QHHI")
+ENTRY_BYTES = ENTRY.size
+KEY = struct.Struct(">Q")
+
+BOOK_PROMOTIONS = (None, 'n', 'b', 'r', 'q')
+MAX_WEIGHT = 0xFFFF
+
+
+def encode_book_move(move):
+    """
+    Polyglot 16-bit form of a Move.
+    """
+    to_col = move.end_col
+    if move.piece_moved.kind == KING and abs(move.end_col - move.start_col) == 2:
+        to_col = 7 if move.end_col == 6 else 0
+    promotion = BOOK_PROMOTIONS.index(move.promotion.lower()) if move.promotion else 0
+    return (to_col | (7 - move.end_row) << 3 | move.start_col << 6
+            | (7 - move.start_row) << 9 | promotion << 12)
+
+
+def decode_book_move(code):
+    """
+    (start_row, start_col, end_row, end_col, promotion letter or None) of a
+    Polyglot move, in board coordinates (row 0 = rank 8).
+    """
+    return (7 - ((code >> 9) & 7), (code >> 6) & 7,
+            7 - ((code >> 3) & 7), code & 7,
+            BOOK_PROMOTIONS[(code >> 12) & 7] if (code >> 12) & 7 < 5 else None)
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """
+        A Polyglot-format opening book, memory-mapped read-only: opening it
+        reads nothing, lookups binary-search the mapped file, and processes
+        sharing a book share its pages through the OS cache.
+
+        Entries are keyed on standard Polyglot hashes (polyglot.py), so
+        any Polyglot book works, as do books written by build_book() below.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.count = 0
+        self.data = None
+        size = self.file.seek(0, 2)
+        if size >= ENTRY_BYTES:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = size // ENTRY_BYTES
+
+    def entries(self, key):
+        """
+        List of (move code, weight) stored for 'key'.
+        """
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if KEY.unpack_from(self.data, mid * ENTRY_BYTES)[0] < key:
+                low = mid + 1
+            else:
+                high = mid
+        found = []
+        for index in range(low, self.count):
+            entry_key, code, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY_BYTES)
+            if entry_key != key:
+                break
+            found.append((code, weight))
+        return found
+
+    def book_moves(self, board, color):
+        """
+        List of (Move, weight) for the position on 'board' with 'color' to move,
+        only moves that are legal here.
+        """
+        found = self.entries(polyglot_key(board, color))
+        if not found:
+            return []
+        legal = {(m.start_row, m.start_col, m.end_row, m.end_col, m.promotion): m
+                 for m in board.generate_legal_moves(color)}
+        moves = []
+        for code, weight in found:
+            start_row, start_col, end_row, end_col, promotion = decode_book_move(code)
+            piece = board.get_piece_at(start_row, start_col)
+            if piece is not None and piece.kind == KING and start_col == 4 and end_col in (0, 7):
+                end_col = 6 if end_col == 7 else 2  # king takes own rook: castling
+            move = legal.get((start_row, start_col, end_row, end_col, promotion))
+            if move is not None and weight:
+                moves.append((move, weight))
+        return moves
+
+    def probe(self, board, color, choice="weighted", rng=random):
+        """
+        A book Move for 'color', or None if the position is not in the book.
+        :param choice: "weighted" -> random, in proportion to the weights;
+                       "best" -> the move with the highest weight
+        """
+        moves = self.book_moves(board, color)
+        if not moves:
+            return None
+        if choice == "best":
+            return max(moves, key=lambda entry: entry[1])[0]
+        return rng.choices([m for m, _ in moves], weights=[w for _, w in moves])[0]
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+
+# ---------------------------------------------------------------------------
+# Building books from games
+
+RESULTS = {"1-0": "WHITE", "0-1": "BLACK", "1/2-1/2": None}
+MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+def read_pgn(lines):
+    """
+    Yield (moves, result) for each game of a PGN file: the SAN moves of
+    the main line (comments, variations and NAGs dropped) and the result
+    ("1-0", "0-1", "1/2-1/2" or "*").
+    """
+    movetext, result = [], "*"
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            if movetext:
+                yield parse_movetext(" ".join(movetext)), result
+                movetext, result = [], "*"
+            if line.startswith("[Result "):
+                result = line.split('"')[1]
+        elif line and not line.startswith("%"):
+            movetext.append(line)
+    if movetext:
+        yield parse_movetext(" ".join(movetext)), result
+
+
+def parse_movetext(text):
+    text = re.sub(r"\{[^}]*\}|;[^\n]*", " ", text)
+    while "(" in text:
+        text = re.sub(r"\([^()]*\)", " ", text)
+    moves = []
+    for token in text.split():
+        token = MOVE_NUMBER.sub("", token)
+        if token and not token.startswith("$") and token not in RESULTS and token != "*":
+            moves.append(token)
+    return moves
+
+
+def find_move(board, color, text, legal_moves):
+    """
+    The legal Move written as 'text' (SAN or coordinate notation), or None.
+    """
+    wanted = normalize_san(text)
+    for move in legal_moves:
+        if str(move) == text.lower():
+            return move
+    # Only moves to the right square need their SAN worked out
+    target = wanted.rstrip("QRBN")[-2:]
+    for move in legal_moves:
+        if wanted.startswith("O") or square_name(move.end_row, move.end_col) == target:
+            if normalize_san(move_to_san(board, move, color, legal_moves)) == wanted:
+                return move
+    return None
+
+
+def build_book(games, path, engine="bitboard", max_plies=24, min_count=1):
+    """
+    Write a book from 'games', an iterable of (moves, result) such as
+    read_pgn() yields, covering the first 'max_plies' plies of each game.
+    A move's weight is 2 per win and 1 per draw of the side that played it
+    (1 per game when no result is known); moves seen in fewer than
+    'min_count' games or that only lost are left out.
+    Return the number of entries written.
+    """
+    weights = {}
+    counts = {}
+    for moves, result in games:
+        board = ENGINES[engine]()
+        board.setup_initial_position()
+        color = "WHITE"
+        for text in moves[:max_plies]:
+            legal_moves = board.generate_legal_moves(color)
+            move = find_move(board, color, text, legal_moves)
+            if move is None:
+                break
+            entry = (polyglot_key(board, color), encode_book_move(move))
+            if result in RESULTS:
+                points = 1 if RESULTS[result] is None else (2 if RESULTS[result] == color else 0)
+            else:
+                points = 1
+            weights[entry] = weights.get(entry, 0) + points
+            counts[entry] = counts.get(entry, 0) + 1
+            board.make_move(move)
+            color = opponent(color)
+
+    written = 0
+    with open(path, "wb") as book:
+        for key, code in sorted(weights):
+            weight = weights[key, code]
+            if weight and counts[key, code] >= min_count:
+                book.write(ENTRY.pack(key, code, min(weight, MAX_WEIGHT), 0))
+                written += 1
+    return written
+
+
+def main(argv=None):
+    """
+    Usage examples:
+      python book.py build games.pgn book.bin --plies 20   -> write a book
+      python book.py probe book.bin                          -> book moves of the start position
+      python book.py probe book.bin --fen "<fen>"
+    """
+    parser = argparse.ArgumentParser(description="Polyglot-format opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from a PGN file")
+    build.add_argument("pgn")
+    build.add_argument("book")
+    build.add_argument("--plies", type=int, default=24)
+    build.add_argument("--min-count", type=int, default=1)
+    probe = commands.add_parser("probe", help="list the book moves of a position")
+    probe.add_argument("book")
+    probe.add_argument("--fen")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.pgn, errors="replace") as pgn:
+            written = build_book(read_pgn(pgn), args.book, max_plies=args.plies, min_count=args.min_count)
+        print(f"Wrote {written} entries to {args.book}")
+        return 0
+
+    board = ENGINES["bitboard"]()
+    if args.fen:
+        color = load_fen(board, args.fen)
+    else:
+        board.setup_initial_position()
+        color = "WHITE"
+    book = OpeningBook(args.book)
+    moves = sorted(book.book_moves(board, color), key=lambda entry: -entry[1])
+    total = sum(w for _, w in moves) or 1
+    for move, weight in moves:
+        print(f"{move}  weight {weight:>5}  ({100.0 * weight / total:.1f}%)")
+    if not moves:
+        print("Position not in book")
+    book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
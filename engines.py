@@ -0,0 +1,11 @@
+# engines.py
+
+from board import Board
+from bitboard import BitBoard
+
+# The two board implementations, by the names the command-line tools take
+ENGINES = {"board": Board, "bitboard": BitBoard}
+
+
+def opponent(color):
+    return "WHITE" if color == "BLACK" else "BLACK"
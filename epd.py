@@ -0,0 +1,153 @@
+# epd.py
+
+import argparse
+import json
+import sys
+import time
+
+from engines import ENGINES
+from fen import load_fen
+from notation import move_to_san, normalize_san
+from search import Search
+
+
+def parse_epd(line):
+    """
+    Split one EPD record into (fen, operations). The four position fields
+    become a FEN (move counters from the hmvc/fmvn operations, else "0 1");
+    operations map an opcode to its list of operands, quotes removed,
+    e.g. {"bm": ["Qg6"], "id": ["WAC.001"]}. Return None for blank/comment lines.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD record: {line!r}")
+
+    operations = {}
+    for operation in (fields[4] if len(fields) > 4 else "").split(";"):
+        tokens = operation.split()
+        if tokens:
+            operations[tokens[0]] = [token.strip('"') for token in tokens[1:]]
+
+    halfmove_clock = operations.get("hmvc", ["0"])[0]
+    fullmove_number = operations.get("fmvn", ["1"])[0]
+    return " ".join(fields[:4] + [halfmove_clock, fullmove_number]), operations
+
+
+def matches(board, move, color, notations, legal_moves):
+    """
+    True if 'move' is one of 'notations' (SAN or coordinate notation).
+    """
+    san = normalize_san(move_to_san(board, move, color, legal_moves))
+    coordinate = str(move)
+    return any(normalize_san(text) == san or text.lower() == coordinate for text in notations)
+
+
+def run_epd(records, engine="bitboard", depth=None, movetime=None, **search_options):
+    """
+    Search every EPD record with a fresh Search under a fixed depth or
+    time and check the result against its best-move ("bm") or avoid-move
+    ("am") operations. Time-to-solution is the time of the iteration from
+    which the search kept choosing a correct move until the end.
+    'search_options' are passed to Search().
+    """
+    results = []
+    for number, line in enumerate(records, 1):
+        parsed = parse_epd(line)
+        if parsed is None:
+            continue
+        fen, operations = parsed
+        board = ENGINES[engine]()
+        color = load_fen(board, fen)
+        legal_moves = board.generate_legal_moves(color)
+
+        search = Search(**search_options)
+        start = time.perf_counter()
+        move = search.find_best_move(board, color, depth=depth, movetime=movetime)
+        elapsed = time.perf_counter() - start
+
+        def correct(text):
+            chosen = next((m for m in legal_moves if str(m) == text), None)
+            if chosen is None:
+                return False
+            if "bm" in operations and not matches(board, chosen, color, operations["bm"], legal_moves):
+                return False
+            if "am" in operations and matches(board, chosen, color, operations["am"], legal_moves):
+                return False
+            return "bm" in operations or "am" in operations
+
+        solved = move is not None and correct(str(move))
+        solution = None
+        if solved:
+            for iteration in reversed(search.iterations):
+                if not correct(iteration["move"]):
+                    break
+                solution = iteration
+
+        results.append({
+            "id": operations.get("id", [str(number)])[0],
+            "fen": fen,
+            "bm": operations.get("bm"),
+            "am": operations.get("am"),
+            "move": move_to_san(board, move, color, legal_moves) if move else None,
+            "solved": solved,
+            "solution_seconds": round(solution["seconds"], 6) if solution else None,
+            "solution_depth": solution["depth"] if solution else None,
+            "depth": search.completed_depth,
+            "nodes": search.nodes,
+            "seconds": round(elapsed, 6),
+            "nps": int(search.nodes / elapsed) if elapsed > 0 else 0,
+        })
+        search.close()
+    return results
+
+
+def main(argv=None):
+    """
+    Usage examples:
+      python epd.py wac.epd --movetime 1000        -> one second per position
+      python epd.py bk.epd --depth 5 --json        -> fixed depth, machine-readable
+    """
+    parser = argparse.ArgumentParser(description="EPD test-suite runner")
+    parser.add_argument("suite", help="EPD file, one position per line with bm/am and id operations")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitboard")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--movetime", type=int, help="milliseconds per position")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    if args.depth is None and args.movetime is None:
+        args.depth = 4
+
+    with open(args.suite) as suite:
+        results = run_epd(suite, args.engine, args.depth, args.movetime, workers=args.workers)
+
+    solved = sum(1 for r in results if r["solved"])
+    total_nodes = sum(r["nodes"] for r in results)
+    total_seconds = sum(r["seconds"] for r in results)
+    nps = int(total_nodes / total_seconds) if total_seconds > 0 else 0
+
+    if args.json:
+        print(json.dumps({"suite": args.suite, "engine": args.engine, "depth": args.depth,
+                          "movetime": args.movetime, "solved": solved, "positions": len(results),
+                          "total_nodes": total_nodes, "total_seconds": round(total_seconds, 6),
+                          "nps": nps, "results": results}, indent=2))
+    else:
+        for r in results:
+            expected = " ".join(r["bm"] or []) or "not " + " ".join(r["am"] or [])
+            if not r["solved"]:
+                found = "not solved"
+            elif r["solution_depth"] is None:
+                found = "solved (no search)"  # book, tablebase or cache move
+            else:
+                found = f"solved at depth {r['solution_depth']} in {r['solution_seconds']:.3f}s"
+            print(f"{r['id']:<12} {str(r['move']):<8} (expected {expected})  {found:<32} "
+                  f"{r['nodes']:>8} nodes  {r['seconds']:7.3f}s  {r['nps']:>7} nps")
+        print(f"\nSolved {solved}/{len(results)}; {total_nodes} nodes in {total_seconds:.3f}s ({nps} nps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,330 @@
-class Evaluator:
-    def __init__(self):
-        # Basic piece values
-        self.values = {
-            'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 1000
-        }
+from pieces.piece import WHITE, BLACK
+
+try:
+    import numpy as np
+except ImportError:  # optional: only Evaluator.evaluate_many and the encoders need it
+    np = None
+
+# Material in centipawns by piece kind (pawn, knight, bishop, rook, queen, king),
+# for the middlegame and the endgame
+MG_VALUES = (100, 320, 330, 500, 900, 0)
+EG_VALUES = (120, 300, 320, 530, 950, 0)
+
+# Game phase: each piece left on the board adds its weight; 24 (or more) is
+# the opening position and pure middlegame, 0 means only kings and pawns
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+# Piece-square bonuses from White's point of view, indexed by square
+# (row*8 + col, so the first line is rank 8). Black uses the mirrored square.
+PAWN_MG = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+]
+PAWN_EG = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+    80,  80,  80,  80,  80,  80,  80,  80,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    30,  30,  30,  30,  30,  30,  30,  30,
+    20,  20,  20,  20,  20,  20,  20,  20,
+    10,  10,  10,  10,  10,  10,  10,  10,
+     5,   5,   5,   5,   5,   5,   5,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+]
+KNIGHT_PST = [
+   -50, -40, -30, -30, -30, -30, -40, -50,
+   -40, -20,   0,   0,   0,   0, -20, -40,
+   -30,   0,  10,  15,  15,  10,   0, -30,
+   -30,   5,  15,  20,  20,  15,   5, -30,
+   -30,   0,  15,  20,  20,  15,   0, -30,
+   -30,   5,  10,  15,  15,  10,   5, -30,
+   -40, -20,   0,   5,   5,   0, -20, -40,
+   -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP_PST = [
+   -20, -10, -10, -10, -10, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,  10,  10,   5,   0, -10,
+   -10,   5,   5,  10,  10,   5,   5, -10,
+   -10,   0,  10,  10,  10,  10,   0, -10,
+   -10,  10,  10,  10,  10,  10,  10, -10,
+   -10,   5,   0,   0,   0,   0,   5, -10,
+   -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK_PST = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+]
+QUEEN_PST = [
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,   5,   5,   5,   0, -10,
+    -5,   0,   5,   5,   5,   5,   0,  -5,
+     0,   0,   5,   5,   5,   5,   0,  -5,
+   -10,   5,   5,   5,   5,   5,   0, -10,
+   -10,   0,   5,   0,   0,   0,   0, -10,
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+KING_MG = [
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -20, -30, -30, -40, -40, -30, -30, -20,
+   -10, -20, -20, -20, -20, -20, -20, -10,
+    20,  20,   0,   0,   0,   0,  20,  20,
+    20,  30,  10,   0,   0,  10,  30,  20,
+]
+KING_EG = [
+   -50, -40, -30, -20, -20, -30, -40, -50,
+   -30, -20, -10,   0,   0, -10, -20, -30,
+   -30, -10,  20,  30,  30,  20, -10, -30,
+   -30, -10,  30,  40,  40,  30, -10, -30,
+   -30, -10,  30,  40,  40,  30, -10, -30,
+   -30, -10,  20,  30,  30,  20, -10, -30,
+   -30, -30,   0,   0,   0,   0, -30, -30,
+   -50, -30, -30, -30, -30, -30, -30, -50,
+]
+MG_PST = (PAWN_MG, KNIGHT_PST, BISHOP_PST, ROOK_PST, QUEEN_PST, KING_MG)
+EG_PST = (PAWN_EG, KNIGHT_PST, BISHOP_PST, ROOK_PST, QUEEN_PST, KING_EG)
+
+# Middlegame and endgame scores travel together as one int, mg + eg * 2**20,
+# so make/undo update both with a single addition
+SCORE_SHIFT = 20
+SCORE_HALF = 1 << (SCORE_SHIFT - 1)
+SCORE_MASK = (1 << SCORE_SHIFT) - 1
+
+
+def pack_score(mg, eg):
+    return mg + (eg << SCORE_SHIFT)
+
+
+def unpack_score(score):
+    """
+    Return (mg, eg) of a pack_score() value (either may be negative).
+    """
+    mg = ((score + SCORE_HALF) & SCORE_MASK) - SCORE_HALF
+    return mg, (score - mg) >> SCORE_SHIFT
+
+
+def _build_psq_table():
+    """
+    PSQ[color_index][kind][square]: material plus piece-square bonus as a
+    packed (mg, eg) score, positive for White and negative for Black.
+    """
+    table = [[], []]
+    for kind in range(6):
+        white = [pack_score(MG_VALUES[kind] + MG_PST[kind][sq], EG_VALUES[kind] + EG_PST[kind][sq])
+                 for sq in range(64)]
+        table[WHITE].append(white)
+        # Mirror vertically (sq ^ 56 flips the rank) and negate for Black
+        table[BLACK].append([-white[sq ^ 56] for sq in range(64)])
+    return table
+
+
+PSQ = _build_psq_table()
+
+
+def psq_totals(board):
+    """
+    (packed psq score, phase) of a position computed from scratch.
+    Boards keep the same totals up to date in make_move/undo_move.
+    """
+    score = 0
+    phase = 0
+    for row, col, piece in board.get_pieces():
+        score += PSQ[piece.color_index][piece.kind][row * 8 + col]
+        phase += PHASE_WEIGHTS[piece.kind]
+    return score, phase
+
+
+# Batch encoding of a position: one int8 per square (row*8 + col),
+# 0 = empty, 1-6 = white pawn..king, 7-12 = black pawn..king
+FEN_CODES = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6,
+             'p': 7, 'n': 8, 'b': 9, 'r': 10, 'q': 11, 'k': 12}
+
+# Centipawns per pseudo-legal knight/bishop/rook/queen move in evaluate_many(mobility=True)
+MOBILITY_WEIGHT = 4
+
+_batch_tables = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch evaluation (pip install numpy)")
 
+
+def _piece_code(piece):
+    return piece.kind + 1 + 6 * piece.color_index
+
+
+def encode_fen(fen):
+    """
+    The 64 square codes of a FEN's piece placement, as a list of ints.
+    """
+    codes = []
+    for ch in fen.split()[0]:
+        if ch.isdigit():
+            codes.extend([0] * int(ch))
+        elif ch != '/':
+            codes.append(FEN_CODES[ch])
+    if len(codes) != 64:
+        raise ValueError(f"Invalid FEN placement: {fen!r}")
+    return codes
+
+
+def encode_board(board):
+    """
+    The 64 square codes of a Board or BitBoard, as a list of ints.
+    """
+    codes = [0] * 64
+    for row, col, piece in board.get_pieces():
+        codes[row * 8 + col] = _piece_code(piece)
+    return codes
+
+
+def encode_positions(positions):
+    """
+    Encode Boards, BitBoards and/or FEN strings into an (N, 64) int8 array
+    for Evaluator.evaluate_many().
+    """
+    _require_numpy()
+    positions = list(positions)
+    array = np.zeros((len(positions), 64), dtype=np.int8)
+    for i, position in enumerate(positions):
+        array[i] = encode_fen(position) if isinstance(position, str) else encode_board(position)
+    return array
+
+
+def _build_batch_tables():
+    """
+    NumPy versions of the evaluation tables, indexed by square code (0-12),
+    plus the attack geometry the mobility term needs.
+    """
+    from board import KNIGHT_JUMPS
+
+    mg = np.zeros((13, 64), dtype=np.int32)
+    eg = np.zeros((13, 64), dtype=np.int32)
+    phase = np.zeros(13, dtype=np.int32)
+    for color in (WHITE, BLACK):
+        for kind in range(6):
+            code = kind + 1 + 6 * color
+            for sq in range(64):
+                mg[code, sq], eg[code, sq] = unpack_score(PSQ[color][kind][sq])
+            phase[code] = PHASE_WEIGHTS[kind]
+
+    knight_targets = np.zeros((64, 64), dtype=np.int32)
+    for sq in range(64):
+        for r, c in KNIGHT_JUMPS[sq]:
+            knight_targets[sq, r * 8 + c] = 1
+
+    def ray_steps(directions):
+        # Per direction, per distance k = 1..7: (source squares whose ray is
+        # at least k long, their k-th square). Each source list is a subset
+        # of the previous one, so a walk can keep narrowing one array.
+        steps = []
+        for dr, dc in directions:
+            walk = []
+            sources = list(range(64))
+            for k in range(1, 8):
+                sources = [sq for sq in sources if 0 <= sq // 8 + k * dr < 8 and 0 <= sq % 8 + k * dc < 8]
+                if not sources:
+                    break
+                targets = [(sq // 8 + k * dr) * 8 + sq % 8 + k * dc for sq in sources]
+                walk.append((np.array(sources, dtype=np.intp), np.array(targets, dtype=np.intp)))
+            steps.append(walk)
+        return steps
+
+    return {"mg": mg, "eg": eg, "phase": phase, "knight_targets": knight_targets,
+            "straight": ray_steps([(1, 0), (-1, 0), (0, 1), (0, -1)]),
+            "diagonal": ray_steps([(1, 1), (1, -1), (-1, 1), (-1, -1)])}
+
+
+def _batch_mobility(codes, tables):
+    """
+    White minus Black pseudo-legal move count of knights and sliders for
+    each row of 'codes', computed with whole-array operations.
+    """
+    empty = codes == 0
+    total = np.zeros(len(codes), dtype=np.int32)
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        base = 6 * color
+        own = (codes > base) & (codes <= base + 6)
+        knights = (codes == base + 2).astype(np.int32)
+        count = ((knights @ tables["knight_targets"]) * ~own).sum(axis=1)
+
+        diagonal = (codes == base + 3) | (codes == base + 5)
+        straight = (codes == base + 4) | (codes == base + 5)
+        not_own = ~own
+        for sliders, steps in ((diagonal, tables["diagonal"]), (straight, tables["straight"])):
+            if not sliders.any():
+                continue
+            for walk in steps:
+                # open_rays[:, i]: the slider on walk's i-th source square can still see further
+                open_rays = sliders
+                previous = np.arange(64)
+                for sources, targets in walk:
+                    open_rays = open_rays[:, np.searchsorted(previous, sources)]
+                    previous = sources
+                    count += (open_rays & not_own[:, targets]).sum(axis=1)
+                    open_rays = open_rays & empty[:, targets]
+        total += sign * count
+    return total
+
+
+class Evaluator:
     def evaluate(self, board):
-        score = 0
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece_at(row, col)
-                if piece:
-                    symbol = piece.symbol()
-                    base_val = self.values.get(symbol.upper(), 0)
-                    if symbol.isupper():
-                        score += base_val
-                    else:
-                        score -= base_val
-        return score
+        """
+        Score in centipawns, positive when White is better: material plus
+        piece-square bonuses, blended from middlegame to endgame values as
+        pieces come off. Boards keep the totals incrementally (psq_score,
+        phase), so this is O(1); other boards are summed from scratch.
+        """
+        score = getattr(board, "psq_score", None)
+        if score is None:
+            score, phase = psq_totals(board)
+        else:
+            phase = board.phase
+        mg, eg = unpack_score(score)
+        if phase > MAX_PHASE:
+            phase = MAX_PHASE  # early promotions
+        return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+    def evaluate_many(self, positions, mobility=False):
+        """
+        Score many positions at once with NumPy (required for this method).
+        :param positions: (N, 64) int8 array from encode_positions(), or a
+                          list of Boards/BitBoards/FEN strings to encode first
+        :param mobility: bool -> add MOBILITY_WEIGHT per knight/slider move
+                         (White minus Black). Without it the scores are the
+                         same as evaluate() on each position.
+        Return an int32 array of N White-positive scores in centipawns.
+        """
+        global _batch_tables
+        _require_numpy()
+        if _batch_tables is None:
+            _batch_tables = _build_batch_tables()
+        tables = _batch_tables
+
+        codes = positions if isinstance(positions, np.ndarray) else encode_positions(positions)
+        index = codes.astype(np.intp)
+        squares = np.arange(64)
+        mg = tables["mg"][index, squares].sum(axis=1)
+        eg = tables["eg"][index, squares].sum(axis=1)
+        phase = np.minimum(tables["phase"][index].sum(axis=1), MAX_PHASE)
+        scores = (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+        if mobility:
+            scores += MOBILITY_WEIGHT * _batch_mobility(codes, tables)
+        return scores.astype(np.int32)
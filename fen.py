@@ -0,0 +1,138 @@
+# fen.py
+
+from pieces.pawn import Pawn
+from pieces.rook import Rook
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.queen import Queen
+from pieces.king import King
+from pieces.piece import PAWN
+from zobrist import compute_key
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+FEN_PIECES = {'p': Pawn, 'r': Rook, 'n': Knight, 'b': Bishop, 'q': Queen, 'k': King}
+
+
+def load_fen(board, fen):
+    """
+    Set up a Board or BitBoard from a FEN string.
+    Return the color to move ("WHITE" or "BLACK"), since boards do not track it.
+    The side to move and the move counters (optional fields, default "0 1")
+    are kept as the origin of the board's move history, see board_to_fen().
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"Invalid FEN: {fen!r}")
+    placement, side, castling, en_passant = fields[:4]
+
+    rows = placement.split('/')
+    if len(rows) != 8:
+        raise ValueError(f"Invalid FEN placement: {placement!r}")
+
+    for row in range(8):
+        for col in range(8):
+            board.set_piece_at(row, col, None)
+
+    for row, row_str in enumerate(rows):
+        col = 0
+        for ch in row_str:
+            if ch.isdigit():
+                col += int(ch)
+            else:
+                piece_class = FEN_PIECES.get(ch.lower())
+                if piece_class is None or col > 7:
+                    raise ValueError(f"Invalid FEN placement: {placement!r}")
+                board.set_piece_at(row, col, piece_class("WHITE" if ch.isupper() else "BLACK"))
+                col += 1
+        if col != 8:
+            raise ValueError(f"Invalid FEN placement: {placement!r}")
+
+    board.white_can_castle_kingside = 'K' in castling
+    board.white_can_castle_queenside = 'Q' in castling
+    board.black_can_castle_kingside = 'k' in castling
+    board.black_can_castle_queenside = 'q' in castling
+
+    if en_passant == '-':
+        board.en_passant_target = None
+    else:
+        board.en_passant_target = (8 - int(en_passant[1]), ord(en_passant[0]) - ord('a'))
+
+    try:
+        halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"Invalid FEN move counters: {fen!r}")
+
+    board.move_history = []
+    color = "WHITE" if side == 'w' else "BLACK"
+    board.start_color = color
+    board.start_halfmove_clock = halfmove_clock
+    board.start_fullmove_number = fullmove_number
+    board.zobrist_key = compute_key(board, color)
+    return color
+
+
+def side_to_move(board):
+    """
+    The color to move: the side to move of the position the move history
+    starts from, flipped once per move (or null move) made since.
+    """
+    if len(board.move_history) % 2 == 0:
+        return board.start_color
+    return "BLACK" if board.start_color == "WHITE" else "WHITE"
+
+
+def move_counters(board):
+    """
+    (halfmove clock, fullmove number) of the current position: plies since
+    the last capture or pawn move, and the number of the move being played.
+    """
+    halfmove_clock = 0
+    for entry in reversed(board.move_history):
+        move = entry[0]
+        if move is not None and (move.piece_moved.kind == PAWN or move.piece_captured is not None):
+            break
+        halfmove_clock += 1
+    else:
+        halfmove_clock += board.start_halfmove_clock
+
+    plies = len(board.move_history) + (1 if board.start_color == "BLACK" else 0)
+    return halfmove_clock, board.start_fullmove_number + plies // 2
+
+
+def board_to_fen(board):
+    """
+    FEN string of the current position of a Board or BitBoard.
+    """
+    rows = []
+    for row in range(8):
+        row_str = ""
+        empty = 0
+        for col in range(8):
+            piece = board.get_piece_at(row, col)
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                row_str += str(empty)
+                empty = 0
+            row_str += piece.symbol()
+        if empty:
+            row_str += str(empty)
+        rows.append(row_str)
+
+    castling = (("K" if board.white_can_castle_kingside else "")
+                + ("Q" if board.white_can_castle_queenside else "")
+                + ("k" if board.black_can_castle_kingside else "")
+                + ("q" if board.black_can_castle_queenside else "")) or "-"
+
+    if board.en_passant_target is None:
+        en_passant = "-"
+    else:
+        row, col = board.en_passant_target
+        en_passant = f"{chr(ord('a') + col)}{8 - row}"
+
+    halfmove_clock, fullmove_number = move_counters(board)
+    side = "w" if side_to_move(board) == "WHITE" else "b"
+    return f"{'/'.join(rows)} {side} {castling} {en_passant} {halfmove_clock} {fullmove_number}"
@@ -1,22 +1,31 @@
 # game_manager.py
 
 from board import Board
+from bitboard import BitBoard
 from search import Search
 
 class GameManager:
-    def __init__(self, use_gui=False, two_player=False):
+    def __init__(self, use_gui=False, two_player=False, use_bitboard=False, movetime=None, book_path=None,
+                 tablebase_path=None):
         """
         Manages overall game flow & state.
         :param use_gui: bool -> are we in GUI mode or CLI?
         :param two_player: bool -> if True, two humans; else White vs AI
+        :param use_bitboard: bool -> play on the BitBoard engine instead of the 2D-list Board
+        :param movetime: int -> milliseconds per AI move; None searches to a fixed depth
+        :param book_path: str -> opening book (see book.py) the AI plays from before searching
+        :param tablebase_path: str -> directory of endgame tables (see tablebase.py)
         """
         self.use_gui = use_gui
         self.two_player = two_player  # new param
 
-        self.board = Board()
+        self.board = BitBoard() if use_bitboard else Board()
         self.board.setup_initial_position()
 
-        self.search_algorithm = Search()  # for AI
+        self.search_algorithm = Search(use_bitboard=use_bitboard, book=book_path,
+                                       tablebases=tablebase_path)  # for AI
+        # Keyword limits passed to Search.find_best_move for every AI move
+        self.search_limits = {"movetime": movetime} if movetime else {"depth": 3}
 
         # White always starts
         self.current_player = "WHITE"
@@ -76,7 +85,7 @@ class GameManager:
         """
         AI picks a move. 
         """
-        move = self.search_algorithm.find_best_move(self.board, self.current_player, depth=3)
+        move = self.search_algorithm.find_best_move(self.board, self.current_player, **self.search_limits)
         if move:
             self.board.make_move(move)
         else:
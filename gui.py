@@ -1,5 +1,6 @@
 import pygame
 import sys
+from background import BackgroundSearch
 
 TILE_SIZE = 80
 BOARD_SIZE = 8
@@ -33,6 +34,14 @@ class ChessGUI:
         # We'll store the set of squares (row,col) where the dragged piece can legally move.
         self.dragging_legal_moves = []
 
+        # The AI thinks on a worker thread so the window keeps redrawing;
+        # during the human's turn it ponders on the reply it expects
+        self.background = BackgroundSearch(game_manager.search_algorithm)
+        self.ai_thinking = False
+        # Zobrist key of the position the AI is searching; a result for any
+        # other position is stale and is thrown away
+        self.ai_position = None
+
         self.load_piece_images()
         self.running = True
         self.clock = pygame.time.Clock()
@@ -63,6 +72,7 @@ class ChessGUI:
             self.draw_board()
             pygame.display.flip()
 
+        self.background.cancel()
         pygame.quit()
         sys.exit()
 
@@ -89,8 +99,9 @@ class ChessGUI:
         board = self.game_manager.board
         piece = board.get_piece_at(row, col)
 
-        # Check if it's the current player's piece
-        if piece and piece.color == self.game_manager.current_player:
+        # Only the human's own pieces, and only while the AI is not thinking
+        if (piece and piece.color == self.game_manager.current_player
+                and self.game_manager.current_player == "WHITE" and not self.ai_thinking):
             self.dragging_piece = piece
             self.drag_start_row = row
             self.drag_start_col = col
@@ -125,6 +136,12 @@ class ChessGUI:
             # Attempt the move
             self.game_manager.handle_player_move(move_str)
 
+            # A ponder search on any other reply is searching the wrong position
+            board = self.game_manager.board
+            last_move = board.move_history[-1][0] if board.move_history else None
+            if not self.background.is_hit(last_move):
+                self.background.cancel()
+
             # If it was white, switch to black
             if self.game_manager.current_player == "WHITE":
                 self.game_manager.current_player = "BLACK"
@@ -144,20 +161,45 @@ class ChessGUI:
 
     def ai_move(self):
         """
-        If black is AI, pick the best move from generate_legal_moves().
+        Called every frame while it is the AI's (black's) turn; never blocks.
+        The first call starts the search in the background, or, if the human
+        played the move we were pondering on, lets that search carry on.
+        Later calls poll for the result and play it once it is ready.
         """
-        move = self.game_manager.search_algorithm.find_best_move(
-            self.game_manager.board,
-            self.game_manager.current_player,
-            depth=3
-        )
+        board = self.game_manager.board
+        if not self.ai_thinking:
+            self.ai_thinking = True
+            last_move = board.move_history[-1][0] if board.move_history else None
+            if self.background.is_hit(last_move):
+                self.background.ponderhit()
+            else:
+                self.background.start(board, self.game_manager.current_player,
+                                      **self.game_manager.search_limits)
+            self.ai_position = board.zobrist_key
+            return
+
+        if board.zobrist_key != self.ai_position:
+            # The board changed under the search: drop it and start over next frame
+            self.background.cancel()
+            self.ai_thinking = False
+            return
+        result = self.background.poll()
+        if result is None:
+            return
+        self.ai_thinking = False
+
+        move, _, pv = result
         if move:
-            self.game_manager.board.make_move(move)
+            board.make_move(move)
         else:
             print(f"No legal moves for {self.game_manager.current_player}.")
         # Switch to white
         self.game_manager.current_player = "WHITE"
 
+        # Ponder on the reply the principal variation expects from white
+        if move and len(pv) > 1:
+            self.background.ponder(board, pv[1], "BLACK", **self.game_manager.search_limits)
+
     def draw_board(self):
         # 1) Draw squares
         for row in range(BOARD_SIZE):
@@ -2,7 +2,6 @@
 
 import sys
 from game_manager import GameManager
-from gui import ChessGUI
 
 def main():
     """
@@ -12,18 +11,47 @@ def main():
       python main.py --cli           -> Play White vs AI (Black)
       python main.py --cli --2p      -> Two humans, no AI
       python main.py                -> GUI mode (drag & drop)
+      python main.py --bitboard     -> any of the above on the BitBoard engine
+      python main.py --movetime 500 -> AI thinks 500 ms per move instead of a fixed depth
+      python main.py --book book.bin -> AI plays opening moves from a book (see book.py)
+      python main.py --tablebases tb -> AI plays KQK/KRK/KPK endings from tables (see tablebase.py)
+      python main.py --perft [...]  -> move-generation benchmark (see perft.py)
+      python main.py --uci          -> UCI engine on stdin/stdout (for chess GUIs and match runners)
     """
+    if "--perft" in sys.argv:
+        from perft import main as perft_main
+        sys.exit(perft_main([arg for arg in sys.argv[1:] if arg != "--perft"]))
+
+    if "--uci" in sys.argv:
+        from uci import main as uci_main
+        sys.exit(uci_main())
+
+    use_bitboard = "--bitboard" in sys.argv
+    movetime = None
+    if "--movetime" in sys.argv:
+        movetime = int(sys.argv[sys.argv.index("--movetime") + 1])
+    book_path = None
+    if "--book" in sys.argv:
+        book_path = sys.argv[sys.argv.index("--book") + 1]
+    tablebase_path = None
+    if "--tablebases" in sys.argv:
+        tablebase_path = sys.argv[sys.argv.index("--tablebases") + 1]
+
     if "--cli" in sys.argv:
         if "--2p" in sys.argv:
             # Two-human CLI mode
-            gm = GameManager(use_gui=False, two_player=True)
+            gm = GameManager(use_gui=False, two_player=True, use_bitboard=use_bitboard, movetime=movetime,
+                             book_path=book_path, tablebase_path=tablebase_path)
         else:
             # One-human (White) vs AI (Black)
-            gm = GameManager(use_gui=False, two_player=False)
+            gm = GameManager(use_gui=False, two_player=False, use_bitboard=use_bitboard, movetime=movetime,
+                             book_path=book_path, tablebase_path=tablebase_path)
         gm.start_game()
     else:
-        # GUI
-        gm = GameManager(use_gui=True, two_player=False) 
+        # GUI (imported here so CLI and benchmark modes work without pygame)
+        from gui import ChessGUI
+        gm = GameManager(use_gui=True, two_player=False, use_bitboard=use_bitboard, movetime=movetime,
+                         book_path=book_path, tablebase_path=tablebase_path)
         # If you want a two-human GUI, set two_player=True 
         # and skip AI logic in the GUI.
         gui = ChessGUI(gm)
@@ -1,7 +1,31 @@
+# move.py
+
+# A move's 16-bit "packed" int form identifies it within a position; it is
+# what the transposition table and the killer slots store and what moves
+# are compared by. Move generation still builds one Move per candidate.
+#   bits  0-5   from square (row*8 + col, a8 = 0 ... h1 = 63)
+#   bits  6-11  to square
+#   bits 12-14  promotion (see PROMOTION_CODES)
+PROMOTION_CODES = {None: 0, 'q': 1, 'r': 2, 'b': 3, 'n': 4,
+                   'Q': 1, 'R': 2, 'B': 3, 'N': 4}
+
+
+def pack_move(move):
+    """
+    The 16-bit packed form of a Move (0 for None), for the transposition
+    table and killer slots.
+    """
+    return move.packed if move is not None else 0
+
+
 class Move:
+    __slots__ = ("start_row", "start_col", "end_row", "end_col",
+                 "piece_moved", "piece_captured", "promotion", "packed")
+
     def __init__(self, start_row, start_col, end_row, end_col, piece_moved, piece_captured=None, promotion=None):
         """
-        A basic Move object.
+        A basic Move object. 'packed' holds the 16-bit int form (from, to,
+        promotion), so comparing and hashing moves never touches the pieces.
         """
         self.start_row = start_row
         self.start_col = start_col
@@ -10,17 +34,18 @@ class Move:
         self.piece_moved = piece_moved
         self.piece_captured = piece_captured
         self.promotion = promotion
+        self.packed = ((start_row * 8 + start_col) | (end_row * 8 + end_col) << 6
+                       | PROMOTION_CODES[promotion] << 12)
 
     def __eq__(self, other):
         if not isinstance(other, Move):
             return False
-        return (self.start_row == other.start_row and
-                self.start_col == other.start_col and
-                self.end_row == other.end_row and
-                self.end_col == other.end_col and
+        return (self.packed == other.packed and
                 self.piece_moved == other.piece_moved and
-                self.piece_captured == other.piece_captured and
-                self.promotion == other.promotion)
+                self.piece_captured == other.piece_captured)
+
+    def __hash__(self):
+        return self.packed
 
     def __str__(self):
         """
@@ -0,0 +1,74 @@
+# movepicker.py
+
+from pieces.piece import PAWN, KING
+
+
+def is_tactical(move):
+    """
+    True for captures, en passant and promotions; these make up the capture
+    stage, everything else (castling included) is a quiet move.
+    """
+    return (move.piece_captured is not None or bool(move.promotion)
+            or (move.piece_moved.kind == PAWN and move.start_col != move.end_col))
+
+
+def move_from_packed(board, color, packed):
+    """
+    Rebuild the legal Move of 'color' whose packed form is 'packed',
+    or return None if it is not legal here (a hash collision, or a killer
+    from a sibling position). Only the moving piece's moves are generated.
+    """
+    frm, to = packed & 63, (packed >> 6) & 63
+    row, col = frm >> 3, frm & 7
+    piece = board.get_piece_at(row, col)
+    if piece is None or piece.color != color:
+        return None
+    if piece.kind == KING and abs((to & 7) - col) == 2:
+        # Castling is already checked for attacked squares
+        candidates = board.generate_castling_moves(color)
+    else:
+        candidates = piece.get_legal_moves(board, row, col)
+    for move in candidates:
+        if move.packed == packed:
+            return move if board.is_legal_move(move, color) else None
+    return None
+
+
+def staged_moves(board, color, tt_move=0, killers=(), capture_key=None, quiet_key=None):
+    """
+    Yield the legal moves of 'color' in the order a search wants to try
+    them, generating each stage only when the previous one is used up:
+      1) the transposition table move ('tt_move', packed)
+      2) captures, en passant and promotions, sorted by 'capture_key'
+      3) the killer moves (packed) that are legal quiet moves here
+      4) the other quiet moves, sorted by 'quiet_key'
+    Keys sort in descending order. A node that cuts off on the TT move
+    never generates the rest; one that cuts off on a capture never
+    generates a quiet move.
+    """
+    if tt_move:
+        move = move_from_packed(board, color, tt_move)
+        if move is not None:
+            yield move
+
+    captures = board.generate_legal_captures(color)
+    if capture_key is not None:
+        captures.sort(key=capture_key, reverse=True)
+    for move in captures:
+        if move.packed != tt_move:
+            yield move
+
+    tried = [tt_move]
+    for killer in killers:
+        if killer and killer not in tried:
+            tried.append(killer)
+            move = move_from_packed(board, color, killer)
+            if move is not None and not is_tactical(move):
+                yield move
+
+    quiets = board.generate_legal_quiets(color)
+    if quiet_key is not None:
+        quiets.sort(key=quiet_key, reverse=True)
+    for move in quiets:
+        if move.packed not in tried:
+            yield move
@@ -0,0 +1,60 @@
+# notation.py
+
+from engines import opponent
+from pieces.piece import PAWN, KING
+
+SAN_LETTERS = {1: "N", 2: "B", 3: "R", 4: "Q", 5: "K"}
+
+
+def move_to_san(board, move, color, legal_moves=None):
+    """
+    Standard algebraic notation of a legal move, e.g. 'Nbd7', 'exd6', 'e8=Q+', 'O-O'.
+    :param legal_moves: the legal moves of 'color', if already generated
+    """
+    if legal_moves is None:
+        legal_moves = board.generate_legal_moves(color)
+    kind = move.piece_moved.kind
+
+    if kind == KING and abs(move.end_col - move.start_col) == 2:
+        san = "O-O" if move.end_col == 6 else "O-O-O"
+    elif kind == PAWN:
+        san = ""
+        if move.start_col != move.end_col:
+            san = chr(ord('a') + move.start_col) + "x"
+        san += square_name(move.end_row, move.end_col)
+        if move.promotion:
+            san += "=" + move.promotion.upper()
+    else:
+        # Disambiguate by file, else rank, else both, among same-kind moves to the same square
+        rivals = [m for m in legal_moves
+                  if m.piece_moved.kind == kind and m.end_row == move.end_row and m.end_col == move.end_col
+                  and (m.start_row, m.start_col) != (move.start_row, move.start_col)]
+        origin = ""
+        if rivals:
+            if all(m.start_col != move.start_col for m in rivals):
+                origin = chr(ord('a') + move.start_col)
+            elif all(m.start_row != move.start_row for m in rivals):
+                origin = str(8 - move.start_row)
+            else:
+                origin = square_name(move.start_row, move.start_col)
+        capture = "x" if move.piece_captured is not None else ""
+        san = SAN_LETTERS[kind] + origin + capture + square_name(move.end_row, move.end_col)
+
+    board.make_move(move)
+    other = opponent(color)
+    if board.is_in_check(other):
+        san += "#" if not board.generate_legal_moves(other) else "+"
+    board.undo_move()
+    return san
+
+
+def square_name(row, col):
+    return f"{chr(ord('a') + col)}{8 - row}"
+
+
+def normalize_san(san):
+    """
+    Drop check marks and annotations so 'Qxf7+!' compares equal to 'Qxf7'
+    (and accept 'e8Q' for 'e8=Q' and '0-0' for 'O-O').
+    """
+    return san.rstrip("+#!?").replace("=", "").replace("0", "O")
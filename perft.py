@@ -0,0 +1,144 @@
+# perft.py
+
+import argparse
+import json
+import sys
+import time
+
+from engines import ENGINES, opponent
+from fen import STARTING_FEN, load_fen
+
+# Standard perft reference positions with known node counts per depth (1, 2, 3, ...)
+REFERENCE_POSITIONS = [
+    ("startpos", STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, color, depth):
+    """
+    Count the leaf nodes of the legal move tree 'depth' plies deep.
+    """
+    if depth == 0:
+        return 1
+    moves = board.generate_legal_moves(color)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    next_color = opponent(color)
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, next_color, depth - 1)
+        board.undo_move()
+    return nodes
+
+
+def divide(board, color, depth):
+    """
+    Perft split by root move: { 'e2e4': nodes, ... }.
+    Comparing this against another engine pinpoints a move-generation bug.
+    """
+    counts = {}
+    next_color = opponent(color)
+    for move in board.generate_legal_moves(color):
+        board.make_move(move)
+        counts[str(move)] = perft(board, next_color, depth - 1)
+        board.undo_move()
+    return counts
+
+
+def run_suite(engine="bitboard", max_depth=3, positions=None):
+    """
+    Run perft on each reference position up to 'max_depth' and return one
+    result dict per (position, depth) with node counts, timing and NPS.
+    """
+    board_class = ENGINES[engine]
+    results = []
+    for name, fen, expected in positions or REFERENCE_POSITIONS:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            board = board_class()
+            color = load_fen(board, fen)
+            start = time.perf_counter()
+            nodes = perft(board, color, depth)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "engine": engine,
+                "position": name,
+                "fen": fen,
+                "depth": depth,
+                "nodes": nodes,
+                "expected": expected[depth - 1],
+                "passed": nodes == expected[depth - 1],
+                "seconds": round(elapsed, 6),
+                "nps": int(nodes / elapsed) if elapsed > 0 else 0,
+            })
+    return results
+
+
+def main(argv=None):
+    """
+    Usage examples:
+      python perft.py                          -> reference suite on BitBoard, depth 3
+      python perft.py --engine board --depth 2 -> same on the 2D-list Board
+      python perft.py --json > perft.json      -> machine-readable results
+      python perft.py --divide 3 --fen "<fen>" -> per-move node counts
+    """
+    parser = argparse.ArgumentParser(description="Perft move-generation benchmark")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="bitboard")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--divide", type=int, metavar="DEPTH")
+    parser.add_argument("--fen", default=STARTING_FEN)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.divide:
+        board = ENGINES[args.engine]()
+        color = load_fen(board, args.fen)
+        counts = divide(board, color, args.divide)
+        if args.json:
+            print(json.dumps({"fen": args.fen, "depth": args.divide, "moves": counts,
+                              "nodes": sum(counts.values())}, indent=2))
+        else:
+            for move_str in sorted(counts):
+                print(f"{move_str}: {counts[move_str]}")
+            print(f"\nMoves: {len(counts)}  Nodes: {sum(counts.values())}")
+        return 0
+
+    results = run_suite(args.engine, args.depth)
+    total_nodes = sum(r["nodes"] for r in results)
+    total_seconds = sum(r["seconds"] for r in results)
+    passed = all(r["passed"] for r in results)
+
+    if args.json:
+        print(json.dumps({
+            "engine": args.engine,
+            "max_depth": args.depth,
+            "passed": passed,
+            "total_nodes": total_nodes,
+            "total_seconds": round(total_seconds, 6),
+            "nps": int(total_nodes / total_seconds) if total_seconds > 0 else 0,
+            "results": results,
+        }, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["passed"] else f"FAIL (expected {r['expected']})"
+            print(f"{r['position']:<10} depth {r['depth']}  {r['nodes']:>9} nodes  "
+                  f"{r['seconds']:8.3f}s  {r['nps']:>8} nps  {status}")
+        nps = int(total_nodes / total_seconds) if total_seconds > 0 else 0
+        print(f"\nTotal: {total_nodes} nodes in {total_seconds:.3f}s ({nps} nps)  "
+              f"{'all passed' if passed else 'FAILURES'}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
-from .piece import Piece
+from .piece import Piece, KING
 from move import Move
 
 class King(Piece):
-    def __init__(self, color):
-        super().__init__(color)
+    __slots__ = ()
+    KIND = KING
 
     def get_legal_moves(self, board, row, col):
         moves = []
@@ -17,11 +17,11 @@ class King(Piece):
             if 0 <= r < 8 and 0 <= c < 8:
                 target_piece = board.get_piece_at(r, c)
                 if target_piece is None:
-                    moves.append(Move(row, col, r, c, board.get_piece_at(row, col)))
+                    moves.append(Move(row, col, r, c, self))
                 else:
                     # capture if enemy
-                    if target_piece.color != self.color:
-                        moves.append(Move(row, col, r, c, board.get_piece_at(row, col), target_piece))
+                    if target_piece.color_index != self.color_index:
+                        moves.append(Move(row, col, r, c, self, target_piece))
 
         # In a full implementation, you'd handle castling here.
         return moves
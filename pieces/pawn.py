@@ -1,10 +1,12 @@
 # pieces/pawn.py
-from .piece import Piece
+from .piece import Piece, PAWN
 from move import Move
 
+PROMOTION_CHOICES = ['q', 'r', 'b', 'n']
+
 class Pawn(Piece):
-    def __init__(self, color):
-        super().__init__(color)
+    __slots__ = ()
+    KIND = PAWN
 
     def get_legal_moves(self, board, row, col):
         moves = []
@@ -16,9 +18,11 @@ class Pawn(Piece):
         if self.color == "WHITE":
             direction = -1   # White moves "up" the board (row decreases)
             start_row = 6    # typical start row for White if row=0 is top
+            last_row = 0
         else:
             direction = +1   # Black moves "down" the board (row increases)
             start_row = 1    # typical start row for Black if row=0 is top
+            last_row = 7
 
         # 1) One-square forward (only if empty)
         forward_row = row + direction
@@ -26,8 +30,12 @@ class Pawn(Piece):
         if 0 <= forward_row < 8:
             if board.get_piece_at(forward_row, forward_col) is None:
                 # not blocked
-                moves.append(Move(row, col, forward_row, forward_col, self))
-                
+                if forward_row == last_row:
+                    for promo in PROMOTION_CHOICES:
+                        moves.append(Move(row, col, forward_row, forward_col, self, None, promo))
+                else:
+                    moves.append(Move(row, col, forward_row, forward_col, self))
+
                 # 2) Two-square forward if on starting rank, and empty
                 if row == start_row:
                     two_forward_row = row + 2*direction
@@ -40,14 +48,18 @@ class Pawn(Piece):
             capture_row = row + direction
             if 0 <= capture_row < 8 and 0 <= capture_col < 8:
                 target_piece = board.get_piece_at(capture_row, capture_col)
-                if target_piece and target_piece.color != self.color:
+                if target_piece and target_piece.color_index != self.color_index:
                     # normal capture
-                    moves.append(Move(row, col, capture_row, capture_col, self, target_piece))
+                    if capture_row == last_row:
+                        for promo in PROMOTION_CHOICES:
+                            moves.append(Move(row, col, capture_row, capture_col, self, target_piece, promo))
+                    else:
+                        moves.append(Move(row, col, capture_row, capture_col, self, target_piece))
 
-                # If you have en passant logic, check it here. E.g.:
-                # if (capture_row, capture_col) == board.en_passant_target:
-                #    # create en-passant move
-                #    moves.append(...)
+                # En passant: the target square is empty, Board.make_move
+                # removes the pawn sitting beside us.
+                elif (capture_row, capture_col) == board.en_passant_target:
+                    moves.append(Move(row, col, capture_row, capture_col, self))
 
         return moves
 
@@ -1,6 +1,33 @@
+# Integer piece kinds and colors. Board, BitBoard and the search dispatch on
+# these instead of isinstance() and color strings.
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+COLOR_INDEX = {"WHITE": WHITE, "BLACK": BLACK}
+
+
 class Piece:
-    def __init__(self, color):
-        self.color = color
+    """
+    Pieces are immutable flyweights: Pawn("WHITE") always returns the same
+    object, so boards, moves and undo history share one instance per
+    (type, color) and never allocate pieces while playing.
+    """
+    __slots__ = ("color", "color_index", "kind")
+    KIND = None
+    _instances = {}
+
+    def __new__(cls, color):
+        piece = Piece._instances.get((cls, color))
+        if piece is None:
+            piece = object.__new__(cls)
+            piece.color = color
+            piece.color_index = COLOR_INDEX[color]
+            piece.kind = cls.KIND
+            Piece._instances[cls, color] = piece
+        return piece
+
+    def __reduce__(self):
+        # Copies and unpickled pieces resolve to the shared instance
+        return (self.__class__, (self.color,))
 
     def get_legal_moves(self, board, row, col):
         """
@@ -11,7 +38,7 @@ class Piece:
 
     def __str__(self):
         """
-        Base class returns '?' for unknown piece type. 
+        Base class returns '?' for unknown piece type.
         Children should override with appropriate letter.
         """
         return '?'
@@ -21,4 +48,4 @@ class Piece:
         By default, the symbol is str(self), e.g. 'p' or 'Q'.
         But we keep a separate method if we need direct logic in Board.
         """
-        return str(self)
\ No newline at end of file
+        return str(self)
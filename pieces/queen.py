@@ -1,10 +1,10 @@
 # pieces/queen.py
-from .piece import Piece
+from .piece import Piece, QUEEN
 from move import Move
 
 class Queen(Piece):
-    def __init__(self, color):
-        super().__init__(color)
+    __slots__ = ()
+    KIND = QUEEN
 
     def get_legal_moves(self, board, row, col):
         moves = []
@@ -21,13 +21,13 @@ class Queen(Piece):
                     if target_piece is None:
                         # Empty square
                         moves.append(
-                            Move(row, col, r, c, board.get_piece_at(row, col))
+                            Move(row, col, r, c, self)
                         )
                     else:
                         # Capture if enemy
-                        if target_piece.color != self.color:
+                        if target_piece.color_index != self.color_index:
                             moves.append(
-                                Move(row, col, r, c, board.get_piece_at(row, col), target_piece)
+                                Move(row, col, r, c, self, target_piece)
                             )
                         break
                 else:
@@ -44,12 +44,12 @@ class Queen(Piece):
                     target_piece = board.get_piece_at(r, c)
                     if target_piece is None:
                         moves.append(
-                            Move(row, col, r, c, board.get_piece_at(row, col))
+                            Move(row, col, r, c, self)
                         )
                     else:
-                        if target_piece.color != self.color:
+                        if target_piece.color_index != self.color_index:
                             moves.append(
-                                Move(row, col, r, c, board.get_piece_at(row, col), target_piece)
+                                Move(row, col, r, c, self, target_piece)
                             )
                         break
                 else:
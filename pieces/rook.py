@@ -1,9 +1,9 @@
-from .piece import Piece
+from .piece import Piece, ROOK
 from move import Move
 
 class Rook(Piece):
-    def __init__(self, color):
-        super().__init__(color)
+    __slots__ = ()
+    KIND = ROOK
 
     def get_legal_moves(self, board, row, col):
         moves = []
@@ -16,10 +16,10 @@ class Rook(Piece):
                 if 0 <= r < 8 and 0 <= c < 8:
                     target_piece = board.get_piece_at(r, c)
                     if target_piece is None:
-                        moves.append(Move(row, col, r, c, board.get_piece_at(row, col)))
+                        moves.append(Move(row, col, r, c, self))
                     else:
-                        if target_piece.color != self.color:
-                            moves.append(Move(row, col, r, c, board.get_piece_at(row, col), target_piece))
+                        if target_piece.color_index != self.color_index:
+                            moves.append(Move(row, col, r, c, self, target_piece))
                         break
                 else:
                     break
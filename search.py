@@ -1,132 +1,953 @@
 import math
+import multiprocessing
+import pickle
 import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from evaluator import Evaluator
+from bitboard import BitBoard
+from pieces.piece import PAWN
+from move import pack_move
+from movepicker import move_from_packed
+from analysis_cache import AnalysisCache
+from book import OpeningBook
+from tablebase import Tablebases, MAX_PIECES
+from transposition import (TranspositionTable, SharedTranspositionTable,
+                           EXACT, LOWER_BOUND, UPPER_BOUND)
+
+MAX_DEPTH = 64
+DEFAULT_DEPTH = 4
+# Being checkmated 'ply' plies from the root scores -(MATE_SCORE - ply), so
+# shorter mates score higher; any score beyond MATE_BOUND is a mate
+MATE_SCORE = 99999
+MATE_BOUND = MATE_SCORE - 1000
+# Tablebase wins score TABLEBASE_WIN minus the plies to mate from the root:
+# above any evaluation, below a mate the search finds itself
+TABLEBASE_WIN = 50000
+TABLEBASE_BOUND = TABLEBASE_WIN - 1000
+
+# Check the clock and the stop token every this many nodes (must be a power of two minus one)
+TIME_CHECK_MASK = 255
+
+# Seconds between checks of the stop token while waiting for worker processes
+STOP_POLL_SECONDS = 0.05
+
+# Piece values in centipawns for MVV-LVA ordering and delta pruning (same
+# scale as Evaluator), indexed by piece kind (pawn, knight, bishop, rook, queen, king)
+PIECE_VALUES = (100, 320, 330, 500, 900, 20000)
+
+# In quiescence, skip captures that cannot lift the score to alpha even
+# with this much positional slack on top of the captured material
+DELTA_MARGIN = 200
+
+# Half-width of the root window around the previous iteration's score
+ASPIRATION_WINDOW = 50
+
+# Null-move pruning: depth reduction of the null-move search (one more on
+# deep nodes), and the least remaining depth at which it is tried
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# Late-move reductions: quiet moves ordered after the first
+# LMR_FULL_DEPTH_MOVES are searched one ply shallower (two when very late)
+# at nodes with at least LMR_MIN_DEPTH plies left
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 3
+
+# With several workers, iterations of at least this depth split the root
+# moves over worker processes; shallower ones are searched serially
+PARALLEL_MIN_DEPTH = 4
+# Private transposition table of each worker process, at most this many MB:
+# it is cleared for every new root position, and clearing a large one costs
+# more than the entries the worker's share of the root moves can use save
+WORKER_TT_MB = 4
+
+
+def score_to_tt(score, ply):
+    """
+    Mate and tablebase scores count plies from the root; the transposition
+    table stores them counted from the node itself, since the same position
+    can be reached at another ply.
+    """
+    if score >= TABLEBASE_BOUND:
+        return score + ply
+    if score <= -TABLEBASE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """
+    Inverse of score_to_tt() for a node 'ply' plies from the root.
+    """
+    if score >= TABLEBASE_BOUND:
+        return score - ply
+    if score <= -TABLEBASE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the tree when the time or node budget runs out or the search is stopped.
+    """
+
 
 class Search:
-    def __init__(self):
+    def __init__(self, use_bitboard=False, tt_size_mb=16, use_killers=True, use_history=True,
+                 use_null_move=True, use_lmr=True,
+                 null_move_reduction=NULL_MOVE_REDUCTION, lmr_full_depth_moves=LMR_FULL_DEPTH_MOVES,
+                 workers=1, tt_name=None, book=None, book_choice="weighted", tablebases=None,
+                 cache=None):
+        """
+        :param use_bitboard: bool -> if True, search on a BitBoard copy of the
+                             position even when given a 2D-list Board.
+        :param tt_size_mb: memory budget of the transposition table
+        :param use_killers: bool -> order per-ply killer moves before other quiet moves
+        :param use_history: bool -> order quiet moves by the history heuristic
+        :param use_null_move: bool -> prune nodes where passing still fails high
+        :param use_lmr: bool -> reduce the depth of late quiet moves
+        :param null_move_reduction: int -> plies the null-move search is reduced by
+        :param lmr_full_depth_moves: int -> moves per node searched at full depth before reducing
+        :param workers: int -> worker processes for the root moves of deep
+                        iterations (1 searches everything in this process)
+        :param tt_name: str -> attach to the SharedTranspositionTable of this
+                        name instead of allocating a private table
+        :param book: OpeningBook or path of a book file; positions found in
+                     it are answered from the book without searching
+        :param book_choice: "weighted" (random by weight) or "best" book move
+        :param tablebases: Tablebases or directory of .tb files (see tablebase.py);
+                           covered endings are played and scored from the tables
+        :param cache: AnalysisCache or path of a cache file: every completed
+                      iteration is recorded there, and later searches of the
+                      position (in any process) start from it
+        """
         self.evaluator = Evaluator()
-        self.transposition_table = {}  # { board_fen_or_str : (depth, score) }
+        if tt_name is not None:
+            self.transposition_table = SharedTranspositionTable.attach(tt_name)
+        else:
+            self.transposition_table = TranspositionTable(tt_size_mb)
+        self.use_bitboard = use_bitboard
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.use_null_move = use_null_move
+        self.use_lmr = use_lmr
+        self.null_move_reduction = null_move_reduction
+        self.lmr_full_depth_moves = lmr_full_depth_moves
+        self.workers = max(1, workers)
+        self.tt_size_mb = tt_size_mb
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self.book_choice = book_choice
+        self.tablebases = Tablebases(tablebases) if isinstance(tablebases, str) else tablebases
+        self.cache = AnalysisCache(cache) if isinstance(cache, str) else cache
+
+        # Worker pool and the [score, root move index, root id] bound shared
+        # with it, both created on the first parallel iteration
+        self._pool = None
+        self._shared_bound = None
+
+        # Two killer slots per ply (packed moves of quiet moves that caused a
+        # beta cutoff) and a butterfly table of cutoff counts by [from][to] square
+        self.killers = [[0, 0] for _ in range(MAX_DEPTH + 1)]
+        self.history = [[0] * 64 for _ in range(64)]
 
-    def find_best_move(self, board, color, depth=4):
+        # Limits and statistics of the current/last search
+        self.deadline = None
+        self.node_limit = None
+        self.stop_event = None
+        self.time_budget = None
+        self.search_start = 0.0
+        self.pondering = False
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_score = 0
+        self.principal_variation = []
+        # One entry per completed iteration: depth, cumulative nodes, score, move, pv, seconds
+        self.iterations = []
+        # Called with each new entry of 'iterations' as it completes (e.g. to print UCI info lines)
+        self.on_iteration = None
+        # pv_table[ply]: best line found so far from the node at that ply
+        self.pv_table = [[] for _ in range(MAX_DEPTH + 2)]
+
+    def find_best_move(self, board, color, depth=None, movetime=None,
+                       wtime=None, btime=None, winc=0, binc=0, nodes=None, stop=None, ponder=False,
+                       movestogo=None):
         """
-        Main entry to the search. 
-        Return best move according to minimax with alpha-beta up to 'depth'.
+        Main entry to the search; see find_best_line() for the arguments.
+        Return the best Move, or None if 'color' has no legal move.
         """
-        best_move = None
-        best_score = -math.inf if color == "WHITE" else math.inf
+        return self.find_best_line(board, color, depth, movetime, wtime, btime, winc, binc, nodes,
+                                   stop, ponder, movestogo)[0]
+
+    def find_best_line(self, board, color, depth=None, movetime=None,
+                       wtime=None, btime=None, winc=0, binc=0, nodes=None, stop=None, ponder=False,
+                       movestogo=None):
+        """
+        Return (best_move, score, principal_variation), where score is from
+        White's perspective and principal_variation is the expected line as a
+        list of Moves starting with best_move.
+        Iterative deepening with alpha-beta: search depth 1, 2, 3, ... until
+        'depth' is reached or the time/node budget runs out, then return the
+        best move of the last fully completed depth.
+
+        :param depth: maximum depth (default 4 when no other limit is given)
+        :param movetime: milliseconds to spend on this move
+        :param wtime, btime: milliseconds left on White's/Black's clock
+        :param winc, binc: increment per move in milliseconds
+        :param movestogo: moves left until the next time control, if the clock has one
+        :param nodes: stop after searching this many nodes
+        :param stop: threading.Event (cancellation token); once it is set the
+                     search winds down within a few hundred nodes
+        :param ponder: bool -> think on the opponent's time: the clock does not
+                       run until ponderhit() is called (from another thread)
+
+        With use_bitboard, the returned Move shares its pieces with 'board'
+        and can be passed straight to board.make_move().
+        """
+        if self.use_bitboard and not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_score = 0
+        self.principal_variation = []
+        self.iterations = []
+
+        # Known opening positions are answered from the book without searching
+        if self.book is not None:
+            move = self.book.probe(board, color, self.book_choice)
+            if move is not None:
+                self.principal_variation = [move]
+                return move, 0, [move]
+
+        # So are positions the tablebases cover, with the move that mates fastest
+        if self.tablebases is not None:
+            line = self._tablebase_root(board, color)
+            if line is not None:
+                return line
+
+        start = time.perf_counter()
+        budget = self._time_budget(color, movetime, wtime, btime, winc, binc, movestogo)
+        if depth is None:
+            limited = budget is not None or nodes is not None
+            depth = MAX_DEPTH if limited else DEFAULT_DEPTH
+
+        # A position analysed before is answered from the cache if that got
+        # as deep as this search would: the depth asked for, a mate, or -
+        # by the rule below that stops once half the budget is spent - as
+        # deep as the clock allows. Else the search runs with its move first.
+        cached = self._probe_cache(board, color) if self.cache is not None else None
+        if cached is not None:
+            cached_depth, cached_score, cached_move, cached_seconds = cached
+            if (cached_depth >= depth or abs(cached_score) >= MATE_BOUND
+                    or budget is not None and not ponder and cached_seconds > budget / 2):
+                self._use_cached(color, cached_depth, cached_score, cached_move)
+                return cached_move, self.best_score, self.principal_variation
+
+        self.transposition_table.new_search()
+        self._age_ordering_tables()
+        self.node_limit = nodes
+        self.stop_event = stop
+        self.pondering = ponder
+        self.time_budget = budget
+        self.search_start = start
+        self.deadline = start + budget if budget is not None and not ponder else None
 
         moves = board.generate_legal_moves(color)
 
         if not moves:
+            return None, 0, []
+
+        best_move = moves[0]
+        history_len = len(board.move_history)
+        score = 0
+        if cached is not None:
+            best_move = next(m for m in moves if m.packed == cached_move.packed)
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        for current_depth in range(1, depth + 1):
+            try:
+                move, score = self._aspiration_search(board, color, current_depth, moves, score)
+            except SearchAborted:
+                # Unwind the moves made below the root before we gave up
+                while len(board.move_history) > history_len:
+                    board.undo_move()
+                break
+
+            best_move = move
+            self.best_score = score if color == "WHITE" else -score
+            self.principal_variation = self.pv_table[0] or [move]
+            self.completed_depth = current_depth
+            self.iterations.append({"depth": current_depth, "nodes": self.nodes, "score": self.best_score,
+                                    "move": str(move),
+                                    "pv": [str(m) for m in self.principal_variation],
+                                    "seconds": time.perf_counter() - start})
+            if self.on_iteration is not None:
+                self.on_iteration(self.iterations[-1])
+            if self.cache is not None:
+                self.cache.store(board.zobrist_key, current_depth, score, EXACT, move.packed,
+                                 self.iterations[-1]["seconds"])
+
+            if abs(score) >= MATE_BOUND:
+                break  # forced mate found, deeper search cannot improve on it
+            deadline = self.deadline
+            if deadline is not None:
+                # Don't start an iteration that will most likely not finish
+                if time.perf_counter() - self.search_start > (deadline - self.search_start) / 2:
+                    break
+
+        self.deadline = None
+        self.node_limit = None
+        self.stop_event = None
+        self.pondering = False
+        # Stopped short of what the cache already had: the cached result is deeper
+        if cached is not None and self.completed_depth < cached_depth:
+            self._use_cached(color, cached_depth, cached_score, cached_move)
+            best_move = cached_move
+        return best_move, self.best_score, self.principal_variation
+
+    def new_game(self):
+        """
+        Forget what was learned in the previous game: the transposition table
+        (shared or not), killers, history and the results of the last search.
+        Analysis-cache records depend only on the position, so they stay;
+        the cache is flushed so the old game's results are on disk.
+        """
+        self.transposition_table.clear()
+        self.killers = [[0, 0] for _ in range(MAX_DEPTH + 1)]
+        self.history = [[0] * 64 for _ in range(64)]
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_score = 0
+        self.principal_variation = []
+        self.iterations = []
+        if self.cache is not None:
+            self.cache.flush()
+
+    def ponderhit(self):
+        """
+        The opponent played the move a ponder search assumed: from now on it
+        is a normal search, and its time budget starts running now.
+        """
+        if self.pondering:
+            self.pondering = False
+            if self.time_budget is not None:
+                self.search_start = time.perf_counter()
+                self.deadline = self.search_start + self.time_budget
+
+    def _time_budget(self, color, movetime, wtime, btime, winc, binc, movestogo=None):
+        """
+        Seconds we may spend on this move, or None for no time limit.
+        With a clock, use a fraction of the remaining time (spread over the
+        moves to go, at most 30) plus most of the increment, but never more
+        than half of what is left.
+        """
+        if movetime is not None:
+            return movetime / 1000.0
+        time_left = wtime if color == "WHITE" else btime
+        if time_left is None:
             return None
+        increment = winc if color == "WHITE" else binc
+        budget = time_left / float(min(movestogo or 30, 30)) + increment * 0.8
+        return min(budget, time_left / 2.0) / 1000.0
 
-        # Basic move ordering: sort captures to front
-        moves.sort(key=lambda m: 1 if m.piece_captured else 0, reverse=True)
+    def _age_ordering_tables(self):
+        """
+        Killers only make sense for the tree they came from; history counts
+        are halved so older searches still count, but less.
+        """
+        self.killers = [[0, 0] for _ in range(MAX_DEPTH + 1)]
+        for row in self.history:
+            for to_sq in range(64):
+                row[to_sq] >>= 1
 
-        alpha, beta = -math.inf, math.inf
+    def _check_limits(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if not self.nodes & TIME_CHECK_MASK:
+            self._check_stop()
 
-        for move in moves:
+    def _check_stop(self):
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted()
+
+    def _aspiration_search(self, board, color, depth, moves, previous_score):
+        """
+        Search the root with a narrow window around the previous iteration's
+        score. If the result falls outside it, widen that side and search again.
+        """
+        if self.workers > 1 and depth >= PARALLEL_MIN_DEPTH and len(moves) > 1:
+            search_root = self._search_root_parallel
+        else:
+            search_root = self._search_root
+
+        if depth < 3 or abs(previous_score) >= MATE_BOUND:
+            return search_root(board, color, depth, moves, -math.inf, math.inf)
+
+        window = ASPIRATION_WINDOW
+        alpha, beta = previous_score - window, previous_score + window
+        while True:
+            move, score = search_root(board, color, depth, moves, alpha, beta)
+            if score <= alpha:
+                alpha = -math.inf if window > 4 * ASPIRATION_WINDOW else score - window
+            elif score >= beta:
+                beta = math.inf if window > 4 * ASPIRATION_WINDOW else score + window
+            else:
+                return move, score
+            window *= 2
+
+    def _search_root(self, board, color, depth, moves, alpha, beta):
+        """
+        One principal variation search pass over the root moves.
+        Return (best_move, score), score from the point of view of 'color'.
+        """
+        alpha_orig = alpha
+        best_move = None
+        best_score = -math.inf
+        self.pv_table[0] = []
+
+        entry = self.transposition_table.probe(board.zobrist_key)
+        self._order_moves(moves, entry[3] if entry else 0, 0)
+        opponent = self._opponent(color)
+
+        for i, move in enumerate(moves):
             board.make_move(move)
-            score = self._minimax(board, self._opponent(color), depth - 1, alpha, beta)
+            if i == 0:
+                score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, 1)
+            else:
+                # Scout with a null window; only a move that beats alpha is re-searched
+                score = -self._negamax(board, opponent, depth - 1, -alpha - 1, -alpha, 1)
+                if alpha < score < beta:
+                    score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, 1)
             board.undo_move()
 
-            if color == "WHITE":
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-                alpha = max(alpha, best_score)
-            else:
-                if score < best_score:
-                    best_score = score
-                    best_move = move
-                beta = min(beta, best_score)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[0] = [move] + self.pv_table[1]
+                    if alpha >= beta:
+                        break
 
-            if alpha >= beta:
-                break  # alpha-beta cutoff
+        if best_score <= alpha_orig:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(board.zobrist_key, depth, best_score, flag, pack_move(best_move))
 
-        return best_move
+        # Keep the best move first so a re-search or the next iteration starts with it
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+        return best_move, best_score
 
-    def _minimax(self, board, color, depth, alpha, beta):
+    def _search_root_parallel(self, board, color, depth, moves, alpha, beta):
         """
-        Minimax with alpha-beta. 
-        Return a numeric score from perspective of White (higher is better for White).
+        _search_root() with the root moves split over worker processes
+        ("young brothers wait"): the first move is searched here to set
+        alpha, then every other move goes to the pool as an independent
+        task on its own copy of the board. Workers share the best score
+        found so far, so later tasks scout against the improved bound.
+
+        Each worker keeps its tables across the tasks and iterations of one
+        root position, so what it knows depends on which tasks it happened
+        to run: the node count, and occasionally the score or move, can
+        vary from run to run. Ties go to the earlier root move whatever
+        order the tasks finish in. With a shared transposition table the
+        workers use it instead of their own (Lazy SMP style).
         """
-        # Transposition check
-        board_key = self._board_to_key(board)  
-        # The key might be a FEN string or simpler approach:
-        # board_key = str(board) + ... (plus castling info, etc.)
+        pool = self._worker_pool()
+        entry = self.transposition_table.probe(board.zobrist_key)
+        self._order_moves(moves, entry[3] if entry else 0, 0)
+        opponent = self._opponent(color)
 
-        if board_key in self.transposition_table:
-            stored_depth, stored_score = self.transposition_table[board_key]
-            if stored_depth >= depth:
-                return stored_score
+        first = moves[0]
+        board.make_move(first)
+        best_score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, 1)
+        board.undo_move()
+        best_move, best_index = first, 0
+        self.pv_table[0] = [first] + self.pv_table[1]
 
-        if depth == 0:
-            score = self.evaluator.evaluate(board)
-            self.transposition_table[board_key] = (depth, score)
-            return score
+        if best_score < beta:
+            window_alpha = max(alpha, best_score)
+            bound = self._shared_bound
+            with bound.get_lock():
+                bound[0], bound[1] = window_alpha, 0
+                # A new id tells tasks still running for an earlier, aborted root to stop
+                bound[2] += 1
+                root_id = bound[2]
 
-        if board.is_checkmate(color):
-            # If color is checkmated, that's good for the other side
-            return -99999 if color == "WHITE" else 99999
-        if board.is_stalemate(color):
-            return 0
+            snapshot = pickle.dumps(board)
+            node_budget = self.node_limit - self.nodes if self.node_limit is not None else None
+            pending = {pool.submit(_search_root_move, snapshot, color, move.packed, index, depth,
+                                   window_alpha, beta, root_id, node_budget)
+                       for index, move in enumerate(moves) if index}
+            try:
+                while pending:
+                    # Wake up regularly: a ponder hit can set a deadline, and
+                    # the stop token has to be noticed while workers run
+                    timeout = STOP_POLL_SECONDS
+                    if self.deadline is not None:
+                        timeout = max(0.0, min(timeout, self.deadline - time.perf_counter()))
+                    done, pending = wait(pending, timeout, FIRST_COMPLETED)
+                    self._check_stop()
+                    for future in done:
+                        index, score, pv, nodes = future.result()
+                        self.nodes += nodes
+                        if score is None:
+                            continue
+                        if score > best_score or (score == best_score and best_index and index < best_index):
+                            best_score, best_move, best_index = score, moves[index], index
+                            self.pv_table[0] = [best_move] + pv
+                    if self.node_limit is not None and self.nodes >= self.node_limit:
+                        raise SearchAborted()
+            finally:
+                if pending:
+                    for future in pending:
+                        future.cancel()
+                    with bound.get_lock():
+                        bound[2] += 1
 
-        moves = board.generate_legal_moves(color)
-        if not moves:
-            # No moves but not in check => stalemate
+        if best_score <= alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(board.zobrist_key, depth, best_score, flag, pack_move(best_move))
+
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+        return best_move, best_score
+
+    def _worker_pool(self):
+        if self._pool is None:
+            # Spawned, not forked: a fork while another thread holds a lock
+            # (the UCI loop blocked reading stdin) can deadlock the worker
+            context = multiprocessing.get_context("spawn")
+            self._shared_bound = context.Array('d', 3)
+            options = {"use_killers": self.use_killers, "use_history": self.use_history,
+                       "use_null_move": self.use_null_move, "use_lmr": self.use_lmr,
+                       "null_move_reduction": self.null_move_reduction,
+                       "lmr_full_depth_moves": self.lmr_full_depth_moves,
+                       "tt_size_mb": min(self.tt_size_mb, WORKER_TT_MB)}
+            if self.transposition_table.shared:
+                options["tt_name"] = self.transposition_table.name
+            if self.tablebases is not None:
+                options["tablebases"] = self.tablebases.directory
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                             initargs=(self._shared_bound, options))
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker processes of a parallel search, if any.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._shared_bound = None
+
+    def _probe_cache(self, board, color):
+        """
+        (depth, score, move, seconds) of the cached result for this position,
+        or None on a miss. Score is negamax; seconds is how long the search
+        that stored it took to complete that depth.
+        """
+        entry = self.cache.probe(board.zobrist_key)
+        if entry is None:
+            return None
+        cached_depth, score, _, packed, seconds = entry
+        move = move_from_packed(board, color, packed)
+        if move is None:
+            return None  # a key collision
+        return cached_depth, score, move, seconds
+
+    def _use_cached(self, color, cached_depth, score, move):
+        """
+        Report a cached result as the last completed iteration.
+        """
+        self.best_score = score if color == "WHITE" else -score
+        self.principal_variation = [move]
+        self.completed_depth = cached_depth
+        self.iterations.append({"depth": cached_depth, "nodes": self.nodes, "score": self.best_score,
+                                "move": str(move), "pv": [str(move)], "seconds": 0.0})
+        if self.on_iteration is not None:
+            self.on_iteration(self.iterations[-1])
+
+    def _tablebase_root(self, board, color):
+        """
+        (move, score, [move]) as find_best_line() returns it, chosen by probing
+        the position after each legal move, or None if the tables do not
+        cover this position. Wins go for the shortest mate, losses for the longest.
+        """
+        if self.tablebases.probe(board, color) is None:
+            return None
+        opponent = self._opponent(color)
+        best_move, best_score = None, -math.inf
+        for move in board.generate_legal_moves(color):
+            board.make_move(move)
+            # Not covered after a capture or an under-promotion: a bare-king draw
+            result, plies = self.tablebases.probe(board, opponent) or (0, 0)
+            board.undo_move()
+            score = self._tablebase_score(-result, plies + 1, 0)
+            if score > best_score:
+                best_move, best_score = move, score
+        if best_move is None:
+            return None
+        self.best_score = best_score if color == "WHITE" else -best_score
+        self.principal_variation = [best_move]
+        return best_move, self.best_score, [best_move]
+
+    def _tablebase_score(self, result, plies, ply):
+        """
+        Negamax score of a tablebase result (1 win, -1 loss, 0 draw) with
+        'plies' to mate, seen from 'ply' plies below the root.
+        """
+        if result == 0:
             return 0
+        return result * (TABLEBASE_WIN - ply - plies)
+
+    def _reset_tables(self):
+        """
+        Forget everything learned from earlier searches (a worker does when
+        given a new root position), except a shared transposition table
+        other processes rely on.
+        """
+        if not self.transposition_table.shared:
+            self.transposition_table.clear()
+        self.killers = [[0, 0] for _ in range(MAX_DEPTH + 1)]
+        self.history = [[0] * 64 for _ in range(64)]
+
+    def _search_child(self, board, color, depth, alpha, beta):
+        """
+        Iteratively deepen one root move's subtree ('color' to move, one ply
+        below the root) up to 'depth' with a fixed window, so the deepest
+        pass is ordered by the shallower ones. Negamax score for 'color'.
+        """
+        score = 0
+        for current_depth in range(1, depth + 1):
+            score = self._negamax(board, color, current_depth, alpha, beta, 1)
+        return score
+
+    def _negamax(self, board, color, depth, alpha, beta, ply, allow_null=True):
+        """
+        Principal variation search in negamax form: the score is from the
+        point of view of 'color' (the side to move), so each child's score
+        is negated. The first move gets the full window; the rest are
+        scouted with a null window and re-searched only if they fail high.
+        'ply' is the distance from the root, used to index killers and the PV.
+        'allow_null' is False right after a null move, so two never follow each other.
+        """
+        self._check_limits()
+        self.pv_table[ply] = []
+        pv_node = beta - alpha > 1
+
+        # Endings the tablebases cover have an exact score, whatever the depth
+        if self.tablebases is not None and board.piece_count() <= MAX_PIECES:
+            probed = self.tablebases.probe(board, color)
+            if probed is not None:
+                return self._tablebase_score(probed[0], probed[1], ply)
 
-        # Basic move ordering
-        moves.sort(key=lambda m: 1 if m.piece_captured else 0, reverse=True)
+        # Transposition check, keyed on the board's incremental Zobrist hash
+        board_key = board.zobrist_key
+        alpha_orig = alpha
+        tt_move = 0
 
-        if color == "WHITE":
+        entry = self.transposition_table.probe(board_key)
+        if entry:
+            stored_depth, stored_score, flag, tt_move = entry
+            stored_score = score_from_tt(stored_score, ply)
+            # PV nodes keep searching so the principal variation stays complete
+            if stored_depth >= depth and not pv_node:
+                if flag == EXACT:
+                    return stored_score
+                if flag == LOWER_BOUND and stored_score >= beta:
+                    return stored_score
+                if flag == UPPER_BOUND and stored_score <= alpha:
+                    return stored_score
+
+        if depth <= 0:
+            return self._quiescence(board, color, alpha, beta, ply)
+
+        in_check = board.is_in_check(color)
+        opponent = self._opponent(color)
+
+        # Null-move pruning: if passing the turn still fails high on a reduced
+        # search, a real move will too. Not in check (passing would be illegal)
+        # and not with only king and pawns, where zugzwang makes passing an advantage.
+        if (self.use_null_move and allow_null and not pv_node and not in_check
+                and depth >= NULL_MOVE_MIN_DEPTH and board.has_non_pawn_material(color)
+                and self._static_eval(board, color) >= beta):
+            reduction = self.null_move_reduction + (1 if depth > 6 else 0)
+            board.make_null_move()
+            score = -self._negamax(board, opponent, depth - 1 - reduction, -beta, -beta + 1, ply + 1, False)
+            board.undo_move()
+            if score >= beta:
+                # Don't trust a mate found by passing
+                return beta if score >= MATE_BOUND else score
+
+        # TT move first, then captures, killers and the other quiet moves,
+        # each stage generated only if the earlier ones did not cut off
+        killers = self.killers[ply] if self.use_killers else ()
+        moves = board.generate_staged_moves(color, tt_move, killers, self._capture_order,
+                                            self._quiet_order if self.use_history else None)
+        use_lmr = self.use_lmr and not in_check and depth >= LMR_MIN_DEPTH
+
+        best_move = None
+        best_score = -math.inf
+        for i, move in enumerate(moves):
+            board.make_move(move)
+            if i == 0:
+                score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                reduction = 0
+                # Late-move reductions: a quiet move this far down the ordering
+                # rarely beats alpha, so scout it shallower first. Moves that
+                # give check or are killers keep full depth.
+                if (use_lmr and i >= self.lmr_full_depth_moves
+                        and move.piece_captured is None and not move.promotion
+                        and move.packed not in killers and not board.is_in_check(opponent)):
+                    reduction = 2 if i >= 3 * self.lmr_full_depth_moves and depth >= 5 else 1
+                score = -self._negamax(board, opponent, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if reduction and score > alpha:
+                    score = -self._negamax(board, opponent, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, ply + 1)
+            board.undo_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                    if alpha >= beta:
+                        self._record_cutoff(move, depth, ply)
+                        break
+
+        if best_move is None:
+            # Checkmated (the worst score for the side to move) or stalemate
+            return -(MATE_SCORE - ply) if in_check else 0
+
+        # Store in transposition table with the kind of bound the window gave us
+        if best_score <= alpha_orig:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(board_key, depth, score_to_tt(best_score, ply), flag, pack_move(best_move))
+        return best_score
+
+    def _quiescence(self, board, color, alpha, beta, ply):
+        """
+        Capture-only search below the horizon, so leaves are only evaluated
+        in quiet positions. The side to move may "stand pat" on the static
+        evaluation instead of capturing; when in check, every evasion is
+        searched instead. Negamax scores, like _negamax; 'ply' is the
+        distance from the root, for mate scores.
+        """
+        self._check_limits()
+
+        in_check = board.is_in_check(color)
+        if in_check:
+            moves = board.generate_legal_moves(color)
+            if not moves:
+                return -(MATE_SCORE - ply)
+            stand_pat = None
             best_score = -math.inf
-            for move in moves:
-                board.make_move(move)
-                score = self._minimax(board, self._opponent(color), depth - 1, alpha, beta)
-                board.undo_move()
-                best_score = max(best_score, score)
-                alpha = max(alpha, best_score)
-                if beta <= alpha:
-                    break
         else:
-            best_score = math.inf
-            for move in moves:
-                board.make_move(move)
-                score = self._minimax(board, self._opponent(color), depth - 1, alpha, beta)
-                board.undo_move()
-                best_score = min(best_score, score)
-                beta = min(beta, best_score)
-                if beta <= alpha:
-                    break
+            stand_pat = self._static_eval(board, color)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_score = stand_pat
+            moves = board.generate_legal_captures(color)
+
+        self._order_moves(moves, 0, None)
+        opponent = self._opponent(color)
 
-        # Store in transposition table
-        self.transposition_table[board_key] = (depth, best_score)
+        for move in moves:
+            if (stand_pat is not None and not move.promotion
+                    and stand_pat + self._captured_value(move) + DELTA_MARGIN <= alpha):
+                continue  # delta pruning
+            board.make_move(move)
+            score = -self._quiescence(board, opponent, -beta, -alpha, ply + 1)
+            board.undo_move()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
         return best_score
 
-    def _board_to_key(self, board):
-        """
-        Create a simple string key for the board + castling rights + en passant.
-        Real engines use Zobrist hashing.
-        """
-        rows = []
-        for row in range(8):
-            cols = []
-            for col in range(8):
-                piece = board.get_piece_at(row, col)
-                if piece:
-                    cols.append(str(piece))
-                else:
-                    cols.append(".")
-            rows.append("".join(cols))
-        # add castling info & en passant
-        castling = (board.white_can_castle_kingside,
-                    board.white_can_castle_queenside,
-                    board.black_can_castle_kingside,
-                    board.black_can_castle_queenside)
-        enp = board.en_passant_target
-        return "|".join(rows) + f"|{castling}|{enp}"
+    def _record_cutoff(self, move, depth, ply):
+        """
+        A quiet move refuted this node: remember it as a killer for the ply
+        and reward its (from, to) pair in the history table.
+        """
+        if move.piece_captured is not None or move.promotion:
+            return
+        if self.use_killers:
+            packed = move.packed
+            slots = self.killers[ply]
+            if slots[0] != packed:
+                slots[1] = slots[0]
+                slots[0] = packed
+        if self.use_history:
+            self.history[move.start_row * 8 + move.start_col][move.end_row * 8 + move.end_col] += depth * depth
+
+    def _order_moves(self, moves, tt_move, ply):
+        """
+        Sort in place: the transposition table's best move first, then
+        captures by MVV-LVA (most valuable victim, least valuable attacker),
+        then the killer moves of this ply, then the remaining quiet moves
+        by history score. 'ply' is None in quiescence (no killers there).
+        """
+        killers = self.killers[ply] if ply is not None and self.use_killers else (0, 0)
+        history = self.history if self.use_history else None
+
+        def score(m):
+            packed = m.packed
+            if tt_move and packed == tt_move:
+                return (4, 0)
+            if m.piece_captured is not None:
+                return (3, self._capture_order(m))
+            if packed == killers[0]:
+                return (2, 1)
+            if packed == killers[1]:
+                return (2, 0)
+            if history is not None:
+                return (1, history[m.start_row * 8 + m.start_col][m.end_row * 8 + m.end_col])
+            return (1, 0)
+        moves.sort(key=score, reverse=True)
+
+    def _captured_value(self, move):
+        """
+        Value of the piece a capture removes (an en passant Move has no piece_captured).
+        """
+        return PIECE_VALUES[move.piece_captured.kind if move.piece_captured is not None else PAWN]
+
+    def _capture_order(self, move):
+        """
+        MVV-LVA sort key: most valuable victim first, then least valuable attacker.
+        """
+        return 10 * self._captured_value(move) - PIECE_VALUES[move.piece_moved.kind]
+
+    def _quiet_order(self, move):
+        """
+        History-heuristic sort key of a quiet move.
+        """
+        return self.history[move.start_row * 8 + move.start_col][move.end_row * 8 + move.end_col]
+
+    def _static_eval(self, board, color):
+        """
+        Evaluator score from the point of view of the side to move.
+        """
+        score = self.evaluator.evaluate(board)
+        return score if color == "WHITE" else -score
 
     def _opponent(self, color):
         return "WHITE" if color == "BLACK" else "BLACK"
+
+
+# State of a worker process of a parallel search, set up by _init_worker
+_worker_search = None
+_worker_bound = None
+_worker_root = None
+
+
+def _init_worker(shared_bound, options):
+    global _worker_search, _worker_bound
+    _worker_search = Search(**options)
+    _worker_bound = shared_bound
+
+
+class _RootStopped:
+    """
+    Stop token of a worker task: set once the main process has moved on from
+    the root search the task belongs to (finished, aborted or timed out),
+    or while scouting, once another task has raised the shared best score
+    past the one the scout is testing against.
+    """
+    def __init__(self, bound, root_id, index, alpha):
+        self.bound = bound
+        self.root_id = root_id
+        self.index = index
+        self.alpha = alpha
+        self.scout_bound = math.inf
+
+    def read_bound(self):
+        """
+        The score the task's move has to beat: the best shared so far,
+        one less if that came from a later root move (the earlier one wins
+        a tie), and at least alpha.
+        """
+        bound, best_index = self.bound[0], self.bound[1]
+        if self.index < best_index:
+            bound -= 1
+        return max(bound, self.alpha)
+
+    def bound_raised(self):
+        return self.read_bound() > self.scout_bound
+
+    def is_set(self):
+        return self.bound[2] != self.root_id or self.bound_raised()
+
+
+def _search_root_move(snapshot, color, packed, index, depth, alpha, beta, root_id, node_budget):
+    """
+    Worker task of Search._search_root_parallel: search root move number
+    'index' (packed) of the pickled board 'snapshot' to 'depth'.
+    The move is first scouted against the best score the workers have shared
+    so far, starting over against the new best whenever another task raises
+    it; only if the move beats it is it searched with the full (alpha, beta)
+    window. Return (index, score or None if it cannot be the best move,
+    principal variation below the move, nodes).
+    Raises SearchAborted when the node budget runs out or the root is abandoned.
+    """
+    global _worker_root
+    search = _worker_search
+    board = pickle.loads(snapshot)
+    # Tables stay warm across the tasks and iterations of one root position
+    if board.zobrist_key != _worker_root:
+        search._reset_tables()
+        _worker_root = board.zobrist_key
+    board.make_move(move_from_packed(board, color, packed))
+    opponent = search._opponent(color)
+    history_len = len(board.move_history)
+
+    search.nodes = 0
+    search.node_limit = node_budget
+    stop = search.stop_event = _RootStopped(_worker_bound, root_id, index, alpha)
+
+    while True:
+        with _worker_bound.get_lock():
+            bound = stop.scout_bound = stop.read_bound()
+        try:
+            score = -search._search_child(board, opponent, depth - 1, -bound - 1, -bound)
+            break
+        except SearchAborted:
+            while len(board.move_history) > history_len:
+                board.undo_move()
+            if (not stop.bound_raised() or stop.bound[2] != root_id
+                    or search.node_limit is not None and search.nodes >= search.node_limit):
+                raise
+    if score <= bound:
+        return index, None, [], search.nodes
+
+    # The scout's entries order the full-window search, so one pass will do
+    stop.scout_bound = math.inf
+    score = -search._negamax(board, opponent, depth - 1, -beta, -alpha, 1)
+    with _worker_bound.get_lock():
+        if score > _worker_bound[0] or (score == _worker_bound[0] and index < _worker_bound[1]):
+            _worker_bound[0], _worker_bound[1] = score, index
+    return index, score, list(search.pv_table[1]), search.nodes
@@ -0,0 +1,349 @@
+# tablebase.py
+
+import argparse
+import mmap
+import os
+import sys
+import time
+
+from pieces.piece import PAWN, ROOK, QUEEN, KING
+
+# One file per ending, e.g. KQK.tb: a 16-byte header (magic, version, name)
+# followed by one byte per index
+#   index = ((side * 64 + strong_king) * 64 + weak_king) * 64 + piece
+# where side is 0 with the strong side (the one with the extra piece) to
+# move and 1 with the lone king to move. Squares are row*8 + col as on the
+# boards, seen from the strong side playing "up" the board (a Black strong
+# side is mirrored vertically). Values, for the side to move:
+#   0          draw (also unreachable/illegal indexes)
+#   1..127     wins, mates in that many plies
+#   128 + n    loses, mated in n plies (128: checkmated now)
+MAGIC = b"CMTB"
+VERSION = 1
+HEADER_BYTES = 16
+TABLE_SIZE = 2 * 64 * 64 * 64
+LOSS = 128
+# Most pieces, kings included, of any ending the tables cover
+MAX_PIECES = 3
+
+# Endings and the kind of the strong side's extra piece. KPK promotes into
+# the other two, so they are generated first.
+ENDINGS = {"KQK": QUEEN, "KRK": ROOK, "KPK": PAWN}
+GENERATION_ORDER = ("KQK", "KRK", "KPK")
+
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _build_geometry():
+    king_moves = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        king_moves.append([r * 8 + c for r in range(row - 1, row + 2) for c in range(col - 1, col + 2)
+                           if _on_board(r, c) and (r, c) != (row, col)])
+    king_masks = [sum(1 << t for t in targets) for targets in king_moves]
+
+    rook_dirs = ((-1, 0), (1, 0), (0, -1), (0, 1))
+    bishop_dirs = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+    rays = {}
+    for direction in rook_dirs + bishop_dirs:
+        rays[direction] = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            ray = []
+            row, col = row + direction[0], col + direction[1]
+            while _on_board(row, col):
+                ray.append(row * 8 + col)
+                row, col = row + direction[0], col + direction[1]
+            rays[direction].append(ray)
+
+    # between[a*64+b]: squares strictly between two aligned squares;
+    # aligned[a*64+b]: 1 on a rank/file, 2 on a diagonal, 0 otherwise
+    between = [0] * 4096
+    aligned = [0] * 4096
+    for kind, dirs in ((1, rook_dirs), (2, bishop_dirs)):
+        for direction in dirs:
+            for a in range(64):
+                mask = 0
+                for b in rays[direction][a]:
+                    between[a * 64 + b] = mask
+                    aligned[a * 64 + b] = kind
+                    mask |= 1 << b
+
+    # Squares a white (upward-moving) pawn attacks
+    pawn_masks = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        pawn_masks.append(sum(1 << ((row - 1) * 8 + c) for c in (col - 1, col + 1) if _on_board(row - 1, c)))
+    return king_moves, king_masks, rays, rook_dirs, bishop_dirs, between, aligned, pawn_masks
+
+
+(KING_MOVES, KING_MASKS, RAYS, ROOK_DIRS, BISHOP_DIRS,
+ BETWEEN, ALIGNED, PAWN_MASKS) = _build_geometry()
+SLIDER_DIRS = {QUEEN: ROOK_DIRS + BISHOP_DIRS, ROOK: ROOK_DIRS}
+
+
+def tb_index(side, strong_king, weak_king, piece):
+    return ((side * 64 + strong_king) * 64 + weak_king) * 64 + piece
+
+
+def _attacks(kind, piece, target, occupied):
+    """
+    True if the strong side's extra piece on 'piece' attacks 'target'.
+    """
+    if kind == PAWN:
+        return PAWN_MASKS[piece] >> target & 1
+    line = ALIGNED[piece * 64 + target]
+    if not line or (kind == ROOK and line != 1):
+        return False
+    return not BETWEEN[piece * 64 + target] & occupied
+
+
+def _slider_targets(kind, piece, occupied):
+    targets = []
+    for direction in SLIDER_DIRS[kind]:
+        for sq in RAYS[direction][piece]:
+            if occupied >> sq & 1:
+                break
+            targets.append(sq)
+    return targets
+
+
+def generate(kind, promotion_tables=None):
+    """
+    Retrograde analysis of king + one piece of 'kind' (queen, rook or pawn)
+    against a lone king. Return the table as a bytearray of TABLE_SIZE values.
+    Positions are resolved in order of distance to mate: mates first, then
+    the positions with a move into them, and so on. A lone-king position
+    is lost once every one of its moves leads to a won position.
+    :param promotion_tables: for KPK, {QUEEN: KQK table, ROOK: KRK table}
+    """
+    values = bytearray(TABLE_SIZE)
+    remaining = bytearray(TABLE_SIZE)   # lone-king positions: moves not yet known to lose
+    buckets = {0: []}                   # positions resolved at each distance
+    seeds = {}                          # KPK: wins through a promotion, by distance
+
+    for sk in range(64):
+        for wk in range(64):
+            if wk == sk or KING_MASKS[sk] >> wk & 1:
+                continue
+            for piece in range(64):
+                if piece == sk or piece == wk or (kind == PAWN and piece >> 3 in (0, 7)):
+                    continue
+                occupied = 1 << sk | 1 << wk | 1 << piece
+
+                # Strong side to move: the lone king must not be in check
+                if kind == PAWN and not _attacks(kind, piece, wk, occupied) and piece >> 3 == 1:
+                    to = piece - 8
+                    if to != sk and to != wk:
+                        best = None
+                        for table in promotion_tables.values():
+                            value = table[tb_index(1, sk, wk, to)]
+                            if value >= LOSS and (best is None or value - LOSS < best):
+                                best = value - LOSS
+                        if best is not None:
+                            seeds.setdefault(best + 1, []).append(tb_index(0, sk, wk, piece))
+
+                # Lone king to move: count its legal moves
+                without_king = occupied & ~(1 << wk)
+                count = 0
+                for to in KING_MOVES[wk]:
+                    if to == sk or KING_MASKS[sk] >> to & 1:
+                        continue
+                    if to == piece or not _attacks(kind, piece, to, without_king | 1 << to):
+                        count += 1
+                index = tb_index(1, sk, wk, piece)
+                if count:
+                    remaining[index] = count
+                elif _attacks(kind, piece, wk, occupied):
+                    values[index] = LOSS
+                    buckets[0].append(index)
+
+    distance = 0
+    while buckets.get(distance) or seeds:
+        current = buckets.pop(distance, [])
+        for index in seeds.pop(distance, ()):
+            if not values[index]:
+                values[index] = distance
+                current.append(index)
+        following = buckets.setdefault(distance + 1, [])
+
+        for index in current:
+            piece = index & 63
+            wk = (index >> 6) & 63
+            sk = (index >> 12) & 63
+            occupied = 1 << sk | 1 << wk | 1 << piece
+            if index >> 18:
+                # Lost for the lone king: every strong move into it wins
+                for origin in KING_MOVES[sk]:
+                    if origin == wk or origin == piece or KING_MASKS[wk] >> origin & 1:
+                        continue
+                    if _attacks(kind, piece, wk, 1 << origin | 1 << wk | 1 << piece):
+                        continue
+                    previous = tb_index(0, origin, wk, piece)
+                    if not values[previous]:
+                        values[previous] = distance + 1
+                        following.append(previous)
+                if kind == PAWN:
+                    origins = []
+                    if piece >> 3 < 6 and not occupied >> (piece + 8) & 1:
+                        origins.append(piece + 8)
+                        if piece >> 3 == 4 and not occupied >> (piece + 16) & 1:
+                            origins.append(piece + 16)
+                else:
+                    origins = _slider_targets(kind, piece, occupied)
+                for origin in origins:
+                    if _attacks(kind, origin, wk, 1 << sk | 1 << wk | 1 << origin):
+                        continue
+                    previous = tb_index(0, sk, wk, origin)
+                    if not values[previous]:
+                        values[previous] = distance + 1
+                        following.append(previous)
+            else:
+                # Won for the strong side: the lone-king moves into it lose
+                for origin in KING_MOVES[wk]:
+                    if origin == sk or origin == piece or KING_MASKS[sk] >> origin & 1:
+                        continue
+                    previous = tb_index(1, sk, origin, piece)
+                    if values[previous]:
+                        continue
+                    remaining[previous] -= 1
+                    if not remaining[previous]:
+                        values[previous] = LOSS + distance + 1
+                        following.append(previous)
+        distance += 1
+    return values
+
+
+def write_table(path, name, values):
+    with open(path, "wb") as table:
+        table.write(MAGIC + bytes([VERSION]) + name.encode().ljust(HEADER_BYTES - 5, b"\0"))
+        table.write(values)
+
+
+def generate_all(directory, endings=GENERATION_ORDER, verbose=False):
+    """
+    Generate the tables into 'directory' (the one-off offline step).
+    """
+    os.makedirs(directory, exist_ok=True)
+    needed = set(endings) | ({"KQK", "KRK"} if "KPK" in endings else set())
+    tables = {}
+    for name in GENERATION_ORDER:
+        if name not in needed:
+            continue
+        path = os.path.join(directory, name + ".tb")
+        start = time.perf_counter()
+        promotion_tables = {QUEEN: tables["KQK"], ROOK: tables["KRK"]} if name == "KPK" else None
+        tables[name] = generate(ENDINGS[name], promotion_tables)
+        if name in endings:
+            write_table(path, name, tables[name])
+        if verbose:
+            wins = sum(1 for v in tables[name] if 0 < v < LOSS)
+            longest = max((v for v in tables[name] if v < LOSS), default=0)
+            print(f"{name}: {wins} won positions, longest mate {longest} plies, "
+                  f"{time.perf_counter() - start:.1f}s")
+    return tables
+
+
+class Tablebases:
+    def __init__(self, directory):
+        """
+        The .tb files found in 'directory', memory-mapped read-only: a probe
+        reads one byte of the mapping, so only the pages actually touched are
+        ever loaded.
+        """
+        self.directory = directory
+        self.tables = {}
+        self.files = []
+        for name, kind in ENDINGS.items():
+            path = os.path.join(directory, name + ".tb")
+            if not os.path.exists(path):
+                continue
+            table_file = open(path, "rb")
+            data = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if data[:4] != MAGIC or len(data) != HEADER_BYTES + TABLE_SIZE:
+                data.close()
+                table_file.close()
+                raise ValueError(f"Not a tablebase file: {path}")
+            self.files.append(table_file)
+            self.tables[kind] = data
+
+    def probe(self, board, color):
+        """
+        (result, plies) for the side to move, 'color': result 1 = wins,
+        -1 = loses, 0 = draw, plies = distance to mate. None if the
+        position is not covered (other material, castling rights).
+        """
+        if board.piece_count() != 3 or (board.white_can_castle_kingside or board.white_can_castle_queenside
+                                        or board.black_can_castle_kingside or board.black_can_castle_queenside):
+            return None
+        kings = {}
+        piece = None
+        for row, col, found in board.get_pieces():
+            if found.kind == KING:
+                kings[found.color] = row * 8 + col
+            else:
+                piece, kind, strong = row * 8 + col, found.kind, found.color
+        if piece is None or kind not in self.tables:
+            return None
+        strong_king, weak_king = kings[strong], kings["BLACK" if strong == "WHITE" else "WHITE"]
+        if strong == "BLACK":
+            strong_king, weak_king, piece = strong_king ^ 56, weak_king ^ 56, piece ^ 56
+
+        value = self.tables[kind][HEADER_BYTES + tb_index(0 if color == strong else 1,
+                                                           strong_king, weak_king, piece)]
+        if not value:
+            return 0, 0
+        if value < LOSS:
+            return 1, value
+        return -1, value - LOSS
+
+    def close(self):
+        for data in self.tables.values():
+            data.close()
+        for table_file in self.files:
+            table_file.close()
+        self.tables = {}
+        self.files = []
+
+
+def main(argv=None):
+    """
+    Usage examples:
+      python tablebase.py generate tb/             -> write KQK.tb, KRK.tb, KPK.tb
+      python tablebase.py probe tb/ --fen "8/8/8/8/8/2k5/8/KQ6 w - - 0 1"
+    """
+    from fen import load_fen
+    from engines import ENGINES
+
+    parser = argparse.ArgumentParser(description="Endgame tablebases for KQK, KRK and KPK")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_cmd = commands.add_parser("generate", help="build the tables (one-off, takes a while)")
+    generate_cmd.add_argument("directory")
+    generate_cmd.add_argument("--endings", nargs="+", choices=GENERATION_ORDER, default=list(GENERATION_ORDER))
+    probe_cmd = commands.add_parser("probe", help="look a position up")
+    probe_cmd.add_argument("directory")
+    probe_cmd.add_argument("--fen", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate_all(args.directory, args.endings, verbose=True)
+        return 0
+
+    board = ENGINES["bitboard"]()
+    color = load_fen(board, args.fen)
+    tablebases = Tablebases(args.directory)
+    result = tablebases.probe(board, color)
+    if result is None:
+        print("Position not covered by the tablebases")
+    elif result[0] == 0:
+        print("Draw")
+    else:
+        print(f"{color} {'wins' if result[0] > 0 else 'loses'}, mate in {result[1]} plies")
+    tablebases.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# transposition.py
+
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+# Bound flags stored with each entry
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+
+# Every entry is one 64-bit key plus one 64-bit packed data word:
+#   bits  0-15  best move (packed, see move.py)
+#   bits 16-39  score, offset so it is stored unsigned
+#   bits 40-47  depth
+#   bits 48-49  bound flag (0 = empty slot)
+#   bits 50-57  age (search generation)
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 23
+
+
+class TranspositionTable:
+    # Entries are private to this process
+    shared = False
+
+    def __init__(self, size_mb=16):
+        """
+        Fixed-capacity, direct-mapped table held in two flat arrays.
+        :param size_mb: memory budget; the entry count is the largest
+                        power of two that fits.
+        """
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.keys = array('Q', [0]) * self.size
+        self.data = array('Q', [0]) * self.size
+        self.age = 0
+
+    def new_search(self):
+        """
+        Called once per root search; entries from older searches become
+        replaceable regardless of their depth.
+        """
+        self.age = (self.age + 1) & 0xFF
+
+    def clear(self):
+        self.keys = array('Q', [0]) * self.size
+        self.data = array('Q', [0]) * self.size
+        self.age = 0
+
+    def probe(self, key):
+        """
+        Return (depth, score, flag, move) for 'key', or None on a miss.
+        'move' is a packed move (Move.packed), 0 if no best move was stored.
+        """
+        index = key & self.mask
+        if self.keys[index] != key:
+            return None
+        data = self.data[index]
+        flag = (data >> 48) & 3
+        if not flag:
+            return None
+        return ((data >> 40) & 0xFF,
+                ((data >> 16) & 0xFFFFFF) - SCORE_OFFSET,
+                flag,
+                data & 0xFFFF)
+
+    def store(self, key, depth, score, flag, move=0):
+        """
+        Depth-preferred replacement with aging: an occupied slot is only
+        overwritten by the same position, by an entry from the current
+        search that is at least as deep, or when the old entry is stale.
+        """
+        index = key & self.mask
+        old = self.data[index]
+        if old and self.keys[index] != key:
+            old_age = (old >> 50) & 0xFF
+            old_depth = (old >> 40) & 0xFF
+            if old_age == self.age and old_depth > depth:
+                return
+        elif old and not move:
+            # Keep the best move we already knew for this position
+            move = old & 0xFFFF
+        self.keys[index] = key
+        self.data[index] = (move
+                            | (int(score) + SCORE_OFFSET) << 16
+                            | min(depth, 0xFF) << 40
+                            | flag << 48
+                            | self.age << 50)
+
+    def hashfull(self):
+        """
+        Permille of the first 1000 slots in use, as reported by UCI engines.
+        """
+        sample = min(1000, self.size)
+        used = sum(1 for i in range(sample) if self.data[i])
+        return used * 1000 // sample
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    A TranspositionTable in a multiprocessing.shared_memory block, so
+    Search instances in several processes (parallel workers, or analysis
+    jobs run one after another) read and write the same entries.
+
+    The block holds a 16-byte header (search generation, entry count)
+    followed by one (key ^ data, data) pair of 64-bit words per entry.
+    Writes take no lock: if two processes store into the same slot at
+    once and the words of an entry get mixed up, key ^ data no longer
+    matches the probed key and the entry reads as a miss.
+    """
+    shared = True
+
+    def __init__(self, size_mb=16, name=None):
+        """
+        Create a new shared table.
+        :param size_mb: memory budget, as for TranspositionTable
+        :param name: name of the shared memory block (None picks a free one);
+                     other processes pass it to attach()
+        """
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        size = 1 << (entries.bit_length() - 1)
+        self._open(shared_memory.SharedMemory(name=name, create=True, size=(size + 1) * ENTRY_BYTES))
+        self.words[1] = size
+        self.size = size
+        self.mask = size - 1
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Open the table another process created under 'name'.
+        """
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 every opener registers the block, and its
+            # resource tracker would unlink it when this process exits
+            memory = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(memory._name, "shared_memory")
+        table = cls.__new__(cls)
+        table._open(memory)
+        table.size = table.words[1]
+        table.mask = table.size - 1
+        return table
+
+    def _open(self, memory):
+        self.memory = memory
+        self.name = memory.name
+        self.words = memory.buf.cast('Q')
+
+    def __reduce__(self):
+        # Pickled (e.g. sent to a worker process) as a reference to the block
+        return (SharedTranspositionTable.attach, (self.name,))
+
+    @property
+    def age(self):
+        return self.words[0]
+
+    def new_search(self):
+        self.words[0] = (self.words[0] + 1) & 0xFF
+
+    def clear(self):
+        """
+        Empty the table for every process using it.
+        """
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+        self.words[1] = self.size
+
+    def probe(self, key):
+        """
+        Return (depth, score, flag, move) for 'key', or None on a miss or a torn entry.
+        """
+        words = self.words
+        slot = 2 + 2 * (key & self.mask)
+        data = words[slot + 1]
+        if words[slot] ^ data != key:
+            return None
+        flag = (data >> 48) & 3
+        if not flag:
+            return None
+        return ((data >> 40) & 0xFF,
+                ((data >> 16) & 0xFFFFFF) - SCORE_OFFSET,
+                flag,
+                data & 0xFFFF)
+
+    def store(self, key, depth, score, flag, move=0):
+        """
+        Same replacement rules as TranspositionTable.store().
+        """
+        words = self.words
+        slot = 2 + 2 * (key & self.mask)
+        old = words[slot + 1]
+        age = words[0]
+        if old and words[slot] ^ old != key:
+            old_age = (old >> 50) & 0xFF
+            old_depth = (old >> 40) & 0xFF
+            if old_age == age and old_depth > depth:
+                return
+        elif old and not move:
+            move = old & 0xFFFF
+        data = (move
+                | (int(score) + SCORE_OFFSET) << 16
+                | min(depth, 0xFF) << 40
+                | flag << 48
+                | age << 50)
+        words[slot + 1] = data
+        words[slot] = key ^ data
+
+    def hashfull(self):
+        sample = min(1000, self.size)
+        words = self.words
+        used = sum(1 for i in range(sample) if words[3 + 2 * i])
+        return used * 1000 // sample
+
+    def close(self):
+        """
+        Detach this process from the table (the block stays alive).
+        """
+        self.words.release()
+        self.memory.close()
+
+    def __del__(self):
+        # The block cannot be closed while our view of it is still open
+        if hasattr(self, "words"):
+            self.words.release()
+
+    def unlink(self):
+        """
+        Destroy the block; call once, from the process that created it, after closing.
+        """
+        if not hasattr(self.memory, "_track"):
+            # Before Python 3.13 an attach() in a child process drops the
+            # registration this process's resource tracker shares with it
+            resource_tracker.register(self.memory._name, "shared_memory")
+        self.memory.unlink()
@@ -0,0 +1,287 @@
+# uci.py
+
+import sys
+import threading
+
+from analysis_cache import AnalysisCache
+from background import BackgroundSearch
+from bitboard import BitBoard
+from book import OpeningBook
+from fen import STARTING_FEN, load_fen
+from search import Search, MAX_DEPTH, MATE_SCORE, MATE_BOUND, TABLEBASE_WIN, TABLEBASE_BOUND
+from tablebase import Tablebases
+from transposition import TranspositionTable
+
+ENGINE_NAME = "CheckMate AI"
+ENGINE_AUTHOR = "CheckMate-AI contributors"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+
+# Integer arguments of "go" and the find_best_line() keyword each one maps to
+GO_LIMITS = {"depth": "depth", "movetime": "movetime", "nodes": "nodes",
+             "wtime": "wtime", "btime": "btime", "winc": "winc", "binc": "binc",
+             "movestogo": "movestogo"}
+
+
+class UCIEngine:
+    def __init__(self, output=None):
+        """
+        The engine side of the Universal Chess Interface: reads commands one
+        line at a time (handle()) and writes responses to 'output'.
+        Searches run on a background thread, so "stop" and "ponderhit" are
+        handled while the engine thinks.
+        :param output: file-like object for responses (default sys.stdout)
+        """
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()
+
+        self.hash_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.search = Search(use_bitboard=True, tt_size_mb=self.hash_mb)
+        self.search.on_iteration = self.send_info
+        self.background = BackgroundSearch(self.search, on_finished=self.search_finished)
+
+        self.board = BitBoard()
+        self.color = load_fen(self.board, STARTING_FEN)
+
+        # A "go ponder" search holds its bestmove back until "ponderhit" or
+        # "stop", a "go infinite" one until "stop"
+        self.state_lock = threading.Lock()
+        self.pondering = False
+        self.infinite = False
+        self.held_result = None
+        self.searching_color = self.color
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, stream=None):
+        """
+        Read commands until "quit" or end of input.
+        """
+        for line in stream or sys.stdin:
+            if not self.handle(line):
+                break
+        self.background.cancel()
+        self.search.close()
+
+    def handle(self, line):
+        """
+        Execute one command line. Return False after "quit".
+        Unknown commands are ignored, as the protocol asks.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name Ponder type check default false")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebasePath type string default <empty>")
+            self.send("option name CacheFile type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.background.cancel()
+            with self.state_lock:
+                self.pondering = self.infinite = False
+                self.held_result = None
+            self.search.new_game()
+        elif command == "position":
+            self.background.cancel()
+            self.set_position(args)
+        elif command == "go":
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "quit":
+            return False
+        return True
+
+    def set_option(self, args):
+        """
+        "setoption name <id> [value <x>]"; supports Hash (MB), Threads
+        (worker processes for the root moves), BookFile (opening book),
+        TablebasePath (directory of endgame tables) and CacheFile
+        (persistent analysis cache).
+        """
+        if "name" not in args:
+            return
+        value_at = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:value_at]).lower()
+        value = " ".join(args[value_at + 1:])
+        self.background.cancel()
+        try:
+            if name == "hash":
+                self.hash_mb = max(1, min(int(value), MAX_HASH_MB))
+                self.search.tt_size_mb = self.hash_mb
+                self.search.transposition_table = TranspositionTable(self.hash_mb)
+            elif name == "threads":
+                self.threads = max(1, min(int(value), MAX_THREADS))
+                self.search.close()
+                self.search.workers = self.threads
+            elif name == "bookfile":
+                if self.search.book is not None:
+                    self.search.book.close()
+                self.search.book = OpeningBook(value) if value and value != "<empty>" else None
+            elif name == "tablebasepath":
+                if self.search.tablebases is not None:
+                    self.search.tablebases.close()
+                self.search.tablebases = Tablebases(value) if value and value != "<empty>" else None
+            elif name == "cachefile":
+                if self.search.cache is not None:
+                    self.search.cache.close()
+                self.search.cache = AnalysisCache(value) if value and value != "<empty>" else None
+        except (ValueError, OSError):
+            self.send(f"info string invalid value for {name}: {value}")
+
+    def set_position(self, args):
+        """
+        "position startpos|fen <fen> [moves <move> ...]", moves in
+        coordinate notation (e2e4, e7e8q).
+        """
+        moves_at = args.index("moves") if "moves" in args else len(args)
+        if args and args[0] == "fen":
+            fen = " ".join(args[1:moves_at])
+        else:
+            fen = STARTING_FEN
+
+        board = BitBoard()
+        try:
+            color = load_fen(board, fen)
+        except (ValueError, IndexError):
+            self.send(f"info string invalid fen: {fen}")
+            return
+        for text in args[moves_at + 1:]:
+            move = self.find_move(board, color, text)
+            if move is None:
+                self.send(f"info string illegal move: {text}")
+                break
+            board.make_move(move)
+            color = "BLACK" if color == "WHITE" else "WHITE"
+        self.board, self.color = board, color
+
+    def find_move(self, board, color, text):
+        """
+        The legal Move of 'color' written as 'text', or None.
+        """
+        text = text.lower()
+        for move in board.generate_legal_moves(color):
+            if str(move) == text:
+                return move
+        return None
+
+    def go(self, args):
+        """
+        "go" with depth, movetime, nodes, wtime/btime, winc/binc, movestogo,
+        infinite and ponder. Returns at once; the bestmove line follows
+        when the search ends or is stopped.
+        """
+        limits = {}
+        infinite = ponder = False
+        i = 0
+        while i < len(args):
+            token = args[i]
+            if token in GO_LIMITS and i + 1 < len(args):
+                try:
+                    limits[GO_LIMITS[token]] = int(args[i + 1])
+                except ValueError:
+                    pass
+                i += 2
+                continue
+            if token == "infinite":
+                infinite = True
+            elif token == "ponder":
+                ponder = True
+            i += 1
+
+        if (infinite or ponder) and "depth" not in limits and "nodes" not in limits:
+            # No depth cap: think until "stop" (or until the clock after "ponderhit")
+            limits["depth"] = MAX_DEPTH
+
+        with self.state_lock:
+            self.pondering = ponder
+            self.infinite = infinite
+            self.held_result = None
+            self.searching_color = self.color
+        self.background.start(self.board, self.color, ponder=ponder, **limits)
+
+    def stop(self):
+        with self.state_lock:
+            self.pondering = self.infinite = False
+            held, self.held_result = self.held_result, None
+        if held is not None:
+            self.send_bestmove(held)
+        self.background.stop()
+
+    def ponderhit(self):
+        with self.state_lock:
+            self.pondering = False
+            held = None
+            if not self.infinite:
+                held, self.held_result = self.held_result, None
+        self.background.ponderhit()
+        if held is not None:
+            self.send_bestmove(held)
+
+    def search_finished(self, result):
+        """
+        Called on the search thread when a search ends or is stopped.
+        """
+        with self.state_lock:
+            if self.pondering or self.infinite:
+                # The protocol forbids a bestmove before "ponderhit"/"stop"
+                self.held_result = result
+                return
+        self.send_bestmove(result)
+
+    def send_bestmove(self, result):
+        move, _, pv = result
+        if move is None:
+            self.send("bestmove 0000")
+        elif len(pv) > 1:
+            self.send(f"bestmove {move} ponder {pv[1]}")
+        else:
+            self.send(f"bestmove {move}")
+
+    def send_info(self, iteration):
+        """
+        One "info" line per completed iteration (Search.on_iteration).
+        Scores are from the side to move's point of view.
+        """
+        score = iteration["score"] if self.searching_color == "WHITE" else -iteration["score"]
+        if abs(score) >= TABLEBASE_BOUND:
+            # Mate and tablebase scores count the plies to mate from the root
+            plies = (MATE_SCORE if abs(score) >= MATE_BOUND else TABLEBASE_WIN) - abs(score)
+            moves_to_mate = (plies + 1) // 2
+            score_text = f"mate {moves_to_mate if score > 0 else -moves_to_mate}"
+        else:
+            score_text = f"cp {score}"
+        seconds = iteration["seconds"]
+        nps = int(iteration["nodes"] / seconds) if seconds > 0 else 0
+        self.send(f"info depth {iteration['depth']} score {score_text} nodes {iteration['nodes']} "
+                  f"nps {nps} time {int(seconds * 1000)} "
+                  f"hashfull {self.search.transposition_table.hashfull()} pv {' '.join(iteration['pv'])}")
+
+
+def main():
+    UCIEngine().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# zobrist.py
+
+import random
+
+# Fixed seed so every process (and every run) hashes a position to the same key
+_rng = random.Random(0x5EED)
+
+
+def _rand64():
+    return _rng.getrandbits(64)
+
+
+# PIECE_SQUARE_KEYS[piece.color_index][piece.kind][square], square = row*8 + col,
+# kinds in pieces/piece.py order (pawn, knight, bishop, rook, queen, king).
+PIECE_SQUARE_KEYS = [[[_rand64() for _ in range(64)] for _ in range(6)] for _ in range(2)]
+
+# XORed in for every move made, so the key also encodes the side to move
+SIDE_KEY = _rand64()
+
+# One key per castling right, pre-combined for all 16 combinations
+_CASTLING_RIGHT_KEYS = [_rand64() for _ in range(4)]
+CASTLING_KEYS = []
+for _mask in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _mask & (1 << _bit):
+            _key ^= _CASTLING_RIGHT_KEYS[_bit]
+    CASTLING_KEYS.append(_key)
+
+# Indexed by the en passant file (col)
+EN_PASSANT_KEYS = [_rand64() for _ in range(8)]
+
+
+def castling_index(board):
+    """
+    Pack the four castling flags of a Board/BitBoard into a 0-15 index.
+    """
+    return (board.white_can_castle_kingside
+            | board.white_can_castle_queenside << 1
+            | board.black_can_castle_kingside << 2
+            | board.black_can_castle_queenside << 3)
+
+
+def state_key(board):
+    """
+    The part of the key that depends on castling rights and en passant.
+    """
+    key = CASTLING_KEYS[castling_index(board)]
+    if board.en_passant_target is not None:
+        key ^= EN_PASSANT_KEYS[board.en_passant_target[1]]
+    return key
+
+
+def compute_key(board, color_to_move="WHITE"):
+    """
+    Hash a position from scratch. Boards do this once after setup and then
+    keep the key up to date incrementally in make_move/undo_move.
+    """
+    key = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board.get_piece_at(row, col)
+            if piece:
+                key ^= PIECE_SQUARE_KEYS[piece.color_index][piece.kind][row * 8 + col]
+    if color_to_move == "BLACK":
+        key ^= SIDE_KEY
+    return key ^ state_key(board)